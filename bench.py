@@ -0,0 +1,195 @@
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+from time import perf_counter
+
+from puzzle import Board, Mark, Puzzle, count_placements, line_matches, placements
+from solver import settle_line, solve, solve_line
+
+try:
+    import tkinter as tk
+    from pixel import Game
+except ImportError:
+    tk = Game = None
+
+
+SIZES = (5, 15, 30, 50, 100)
+GUI_SIZES = (5, 15, 30)
+RENDERERS = ('frame', 'canvas', 'viewport')
+MAX_PLACEMENTS = 100000
+CLICKS = 1000
+
+
+def random_puzzle(size, density, rng):
+    bits = [[rng.random() < density for _ in range(size)] for _ in range(size)]
+    return Puzzle.from_bits(f'random-{size}', bits)
+
+
+def measure(function, repeat, number, setup=None):
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((perf_counter() - started) / number * 1e6)
+    return {'us': statistics.median(timings), 'min_us': min(timings), 'repeat': repeat, 'number': number}
+
+
+def bench_possibles(puzzle, repeat):
+    results = {}
+    shapes = {}
+    for clue in puzzle.row_clues + puzzle.col_clues:
+        runs = tuple(run for run in clue if run)
+        shapes.setdefault(len(runs), clue)
+    for runs, clue in sorted(shapes.items()):
+        key = f'possibles/{puzzle.width}/{runs} runs'
+        count = count_placements(clue, puzzle.width)
+        if count > MAX_PLACEMENTS:
+            results[key] = {'skipped': f'{count} placements'}
+            continue
+        number = max(1, MAX_PLACEMENTS // (count * 10 + 1))
+        results[key] = dict(measure(lambda: list(placements(clue, puzzle.width)), repeat, number), placements=count)
+    return results
+
+
+def bench_board(puzzle, repeat, rng):
+    board = Board(puzzle)
+    cells = [(rng.randrange(puzzle.height), rng.randrange(puzzle.width)) for _ in range(CLICKS)]
+    clicks = iter(cells * (repeat + 1))
+
+    def click():
+        board.mark(*next(clicks), Mark.FILLED)
+
+    return {
+        f'click/{puzzle.width}': measure(click, repeat, CLICKS, setup=line_matches.cache_clear),
+        f'update/{puzzle.width}': measure(board.rescan, repeat, max(1, 2000 // puzzle.width), setup=line_matches.cache_clear)}
+
+
+def cold_solve(puzzle, timeout):
+    solve_line.cache_clear()
+    settle_line.cache_clear()
+    return solve(puzzle, max_solutions=2, timeout=timeout)
+
+
+def bench_solve(puzzle, repeat, timeout):
+    result = cold_solve(puzzle, timeout)
+    elapsed = [result.elapsed]
+    if result.elapsed < 1.0:
+        elapsed += [cold_solve(puzzle, timeout).elapsed for _ in range(repeat - 1)]
+    return {f'solve/{puzzle.width}': dict(result.stats(), us=statistics.median(elapsed) * 1e6)}
+
+
+def display_available():
+    if tk is None:
+        return False
+    try:
+        tk.Tk().destroy()
+    except tk.TclError:
+        return False
+    return True
+
+
+if Game is not None:
+    class StartupProbe(Game):
+        def prompt_start(self, event=None):
+            self.clean_exit()
+
+
+def bench_startup(puzzle, renderer):
+    game = StartupProbe(puzzle, renderer=renderer)
+    return {f'startup/{puzzle.width}/{renderer}': {
+        'us': game.timings['interactive'] * 1e6,
+        'first_window_us': game.timings['first_window'] * 1e6}}
+
+
+def run(sizes, seed, density, repeat, solve_timeout, gui_sizes):
+    rng = random.Random(seed)
+    results = {}
+    skipped = {}
+    gui = display_available()
+    if not gui:
+        skipped['startup'] = 'no display' if tk is not None else 'tkinter is not installed'
+    for size in sizes:
+        puzzle = random_puzzle(size, density, rng)
+        results.update(bench_possibles(puzzle, repeat))
+        results.update(bench_board(puzzle, repeat, rng))
+        results.update(bench_solve(puzzle, repeat, solve_timeout))
+        if gui and size in gui_sizes:
+            for renderer in RENDERERS:
+                results.update(bench_startup(puzzle, renderer))
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'density': density,
+            'repeat': repeat},
+        'results': results,
+        'skipped': skipped}
+
+
+def compare(baseline, current, threshold):
+    regressions = []
+    lines = [f'{"benchmark":<32}{"baseline":>14}{"current":>14}{"change":>10}']
+    for key, result in current['results'].items():
+        before = baseline['results'].get(key, {})
+        if 'us' not in result or 'us' not in before:
+            continue
+        change = result['us'] / before['us'] - 1 if before['us'] else 0.0
+        flag = ''
+        if change > threshold:
+            regressions.append(key)
+            flag = ' !'
+        lines.append(f'{key:<32}{before["us"]:>12.1f}us{result["us"]:>12.1f}us{change:>+10.1%}{flag}')
+    return '\n'.join(lines), regressions
+
+
+def report(results):
+    lines = []
+    for key, result in results['results'].items():
+        if 'us' in result:
+            extra = ' (timed out)' if result.get('timed_out') else ''
+            lines.append(f'{key:<32}{result["us"]:>12.1f}us{extra}')
+        else:
+            lines.append(f'{key:<32}{"skipped":>14} ({result["skipped"]})')
+    for key, reason in results['skipped'].items():
+        lines.append(f'{key:<32}{"skipped":>14} ({reason})')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark clue enumeration, validation, solving and startup.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='square board sizes to benchmark')
+    parser.add_argument('--gui-sizes', type=int, nargs='+', default=GUI_SIZES, help='board sizes to time window construction for')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--density', type=float, default=0.6, help='fraction of filled cells in the random puzzles')
+    parser.add_argument('--repeat', type=int, default=5, help='timing repeats per benchmark (the median is reported)')
+    parser.add_argument('--solve-timeout', type=float, default=10.0, help='solver time limit per puzzle in seconds')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', help='compare against a baseline JSON file written by --output')
+    parser.add_argument('--threshold', type=float, default=0.1, help='slowdown fraction reported as a regression')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.seed, args.density, args.repeat, args.solve_timeout, args.gui_sizes)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            table, regressions = compare(json.load(baseline_file), results, args.threshold)
+        print(table)
+        if regressions:
+            print(f'{len(regressions)} regressions over {args.threshold:.0%}: {", ".join(regressions)}', file=sys.stderr)
+            return 1
+        return 0
+    print(report(results))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
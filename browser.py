@@ -0,0 +1,268 @@
+import base64
+import os
+import queue
+import struct
+import threading
+import tkinter as tk
+import zlib
+
+from puzzle import puzzle_key
+from solver import solve
+
+
+THUMBNAIL_SIZE = 32
+THUMBNAIL_SOLVE_TIMEOUT = 2.0
+CACHE_BYTES = 16 * 1024 * 1024
+CACHE_DIRECTORY = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'pixel', 'thumbnails')
+
+
+def png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+def render_png(solution, height, width, size=THUMBNAIL_SIZE):
+    scale = max(1, size // max(height, width, 1))
+    pixel_height = min(height * scale, size)
+    pixel_width = min(width * scale, size)
+    raw = bytearray()
+    for y in range(pixel_height):
+        row = solution[y * height // pixel_height]
+        raw.append(0)
+        raw += bytes(0 if row >> (width - (x * width // pixel_width + 1)) & 1 else 255 for x in range(pixel_width))
+    return (b'\x89PNG\r\n\x1a\n' +
+            png_chunk(b'IHDR', struct.pack('>IIBBBBB', pixel_width, pixel_height, 8, 0, 0, 0, 0)) +
+            png_chunk(b'IDAT', zlib.compress(bytes(raw))) +
+            png_chunk(b'IEND', b''))
+
+
+class ThumbnailCache:
+    def __init__(self, directory=CACHE_DIRECTORY, limit=CACHE_BYTES):
+        self.directory = directory
+        self.limit = limit
+        os.makedirs(directory, exist_ok=True)
+        self.total = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+    def path(self, key):
+        return os.path.join(self.directory, f'{key}.png')
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as thumbnail_file:
+                data = thumbnail_file.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def put(self, key, data):
+        path = self.path(key)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as thumbnail_file:
+            thumbnail_file.write(data)
+        os.replace(temporary, path)
+        self.total += len(data)
+        if self.total > self.limit:
+            self.evict()
+
+    def evict(self):
+        entries = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in os.scandir(self.directory) if entry.is_file())
+        self.total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self.total <= self.limit * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.total -= size
+
+
+def thumbnail(cache, key, puzzle):
+    data = cache.get(key)
+    if data is None:
+        result = solve(puzzle, max_solutions=1, timeout=THUMBNAIL_SOLVE_TIMEOUT)
+        data = render_png(result.solutions[0], puzzle.height, puzzle.width) if result.solutions else b''
+        if not result.timed_out:
+            cache.put(key, data)
+    return data
+
+
+class ThumbnailWorker:
+    def __init__(self, cache):
+        self.cache = cache
+        self.requests = queue.LifoQueue()
+        self.results = queue.Queue()
+        self.wanted = set()
+        self.thread = threading.Thread(target=self.run, name='thumbnails', daemon=True)
+        self.thread.start()
+
+    def submit(self, key, puzzle):
+        self.wanted.add(key)
+        self.requests.put((key, puzzle))
+
+    def forget(self, key):
+        self.wanted.discard(key)
+
+    def stop(self):
+        self.requests.put(None)
+
+    def run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            key, puzzle = request
+            if key in self.wanted:
+                self.results.put((key, thumbnail(self.cache, key, puzzle)))
+
+    def poll(self):
+        while True:
+            try:
+                yield self.results.get_nowait()
+            except queue.Empty:
+                return
+
+
+def format_time(seconds):
+    if seconds is None:
+        return '--:--'
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    return f'{hours}:{minutes:02d}:{seconds:05.2f}' if hours else f'{minutes:02d}:{seconds:05.2f}'
+
+
+class Browser(tk.Frame):
+    ROW_HEIGHT = THUMBNAIL_SIZE + 12
+    WIDTH = 480
+    HEIGHT = 600
+    POLL_MS = 50
+    NAME_X = THUMBNAIL_SIZE + 16
+    SIZE_X = 320
+    BEST_X = 400
+    STRIPE_COLOR = 'gray95'
+
+    def __init__(self, root, puzzles, launch, best_times=None, cache=None):
+        self.root = root
+        self.puzzles = puzzles
+        self.launch_puzzle = launch
+        self.best_times = best_times
+        super(Browser, self).__init__(root)
+
+        self.canvas = tk.Canvas(self, width=Browser.WIDTH, height=Browser.HEIGHT, background='white', highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.canvas.config(yscrollcommand=self.scrollbar.set, scrollregion=(0, 0, Browser.WIDTH, len(puzzles) * Browser.ROW_HEIGHT))
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.LEFT, fill=tk.Y)
+
+        self.rows = {}
+        self.images = {}
+        self.bests = {}
+        self.worker = ThumbnailWorker(cache or ThumbnailCache())
+        self.poll_job = None
+
+        self.canvas.bind('<Configure>', self.refresh)
+        self.canvas.bind('<Button-1>', self.click)
+        self.canvas.bind('<MouseWheel>', lambda event: self.yview('scroll', -1 if event.delta > 0 else 1, 'units'))
+        self.canvas.bind('<Button-4>', lambda event: self.yview('scroll', -1, 'units'))
+        self.canvas.bind('<Button-5>', lambda event: self.yview('scroll', 1, 'units'))
+        self.root.protocol('WM_DELETE_WINDOW', self.clean_exit)
+        self.show()
+
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self.refresh()
+
+    def visible(self):
+        top = int(self.canvas.canvasy(0))
+        view_height = max(self.canvas.winfo_height(), int(self.canvas.cget('height')))
+        return range(max(0, top // Browser.ROW_HEIGHT), min(len(self.puzzles), (top + view_height) // Browser.ROW_HEIGHT + 1))
+
+    def refresh(self, event=None):
+        visible = self.visible()
+        for index in [index for index in self.rows if index not in visible]:
+            key, items = self.rows.pop(index)
+            self.bests.pop(index, None)
+            self.worker.forget(key)
+            self.images.pop(key, None)
+            for item in items:
+                self.canvas.delete(item)
+        for index in visible:
+            if index not in self.rows:
+                self.draw_row(index)
+
+    def draw_row(self, index):
+        puzzle = self.puzzles[index]
+        key = puzzle_key(puzzle)
+        top = index * Browser.ROW_HEIGHT
+        middle = top + Browser.ROW_HEIGHT // 2
+        best = self.bests[index] = self.best_times(key) if self.best_times is not None else None
+        items = [
+            self.canvas.create_rectangle(0, top, Browser.WIDTH * 2, top + Browser.ROW_HEIGHT, outline='',
+                                         fill=Browser.STRIPE_COLOR if index % 2 else 'white', tags=('background',)),
+            self.canvas.create_text(Browser.NAME_X, middle, text=puzzle.name or f'#{index}', anchor=tk.W, font=('Helvetica', 12, 'bold')),
+            self.canvas.create_text(Browser.SIZE_X, middle, text=f'{puzzle.width}x{puzzle.height}', anchor=tk.W, font=('Helvetica', 10)),
+            self.canvas.create_text(Browser.BEST_X, middle, text=format_time(best), anchor=tk.W, font=('Helvetica', 10))]
+        self.rows[index] = (key, items)
+        self.worker.submit(key, puzzle)
+
+    def draw_thumbnail(self, key, data):
+        for index, (row_key, items) in self.rows.items():
+            if row_key != key:
+                continue
+            x, y = 8 + THUMBNAIL_SIZE // 2, index * Browser.ROW_HEIGHT + Browser.ROW_HEIGHT // 2
+            if data:
+                self.images[key] = tk.PhotoImage(data=base64.b64encode(data))
+                items.append(self.canvas.create_image(x, y, image=self.images[key]))
+            else:
+                items.append(self.canvas.create_text(x, y, text='?', font=('Helvetica', 14, 'bold'), fill='gray50'))
+
+    def draw_best_times(self):
+        for index, (key, items) in self.rows.items():
+            best = self.best_times(key)
+            if best != self.bests.get(index):
+                self.bests[index] = best
+                self.canvas.itemconfig(items[3], text=format_time(best))
+
+    def poll_thumbnails(self):
+        for key, data in self.worker.poll():
+            if key not in self.images:
+                self.draw_thumbnail(key, data)
+        if self.best_times is not None:
+            self.draw_best_times()
+        self.poll_job = self.root.after(Browser.POLL_MS, self.poll_thumbnails)
+
+    def click(self, event):
+        index = int(self.canvas.canvasy(event.y)) // Browser.ROW_HEIGHT
+        if 0 <= index < len(self.puzzles):
+            self.launch(index)
+
+    def launch(self, index):
+        self.root.after_cancel(self.poll_job)
+        self.poll_job = None
+        self.pack_forget()
+        self.launch_puzzle(self.puzzles[index], self.root, self.show)
+
+    def show(self):
+        self.root.title('Pixel')
+        self.root.protocol('WM_DELETE_WINDOW', self.clean_exit)
+        self.pack(fill=tk.BOTH, expand=True)
+        for key, items in self.rows.values():
+            for item in items:
+                self.canvas.delete(item)
+        self.rows = {}
+        self.images = {}
+        self.bests = {}
+        self.refresh()
+        if self.poll_job is None:
+            self.poll_job = self.root.after(Browser.POLL_MS, self.poll_thumbnails)
+
+    def clean_exit(self, event=None):
+        self.worker.stop()
+        self.root.destroy()
+
+
+def browse(puzzles, launch, best_times=None):
+    root = tk.Tk()
+    Browser(root, puzzles, launch, best_times)
+    root.mainloop()
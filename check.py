@@ -0,0 +1,79 @@
+import argparse
+import sys
+from time import perf_counter
+
+import numpy as np
+
+from puzzle import GameData
+
+
+def clue_table(clues):
+    runs = [[run for run in clue if run] for clue in clues]
+    table = np.zeros((len(runs), max(map(len, runs), default=0) + 1), dtype=np.int64)
+    for index, clue in enumerate(runs):
+        table[index, :len(clue)] = clue
+    return table, np.array([len(clue) for clue in runs], dtype=np.int64)
+
+
+def line_mismatches(lines, clues):
+    lines = np.asarray(lines, dtype=bool)
+    count, length = lines.shape[-2:]
+    lines = lines.reshape(-1, length)
+    table, expected = clue_table(clues)
+    padded = np.zeros((lines.shape[0], length + 2), dtype=np.int8)
+    padded[:, 1:-1] = lines
+    edges = np.diff(padded, axis=1)
+    line_ids, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    clue_ids = np.arange(lines.shape[0]) % count
+    runs = np.bincount(line_ids, minlength=lines.shape[0])
+    rank = np.arange(line_ids.size) - (np.cumsum(runs) - runs)[line_ids]
+    rank = np.minimum(rank, table.shape[1] - 1)
+    wrong = table[clue_ids[line_ids], rank] != ends - starts
+    mismatched = runs != expected[clue_ids]
+    mismatched |= np.bincount(line_ids[wrong], minlength=lines.shape[0]) > 0
+    return mismatched.reshape(-1, count)
+
+
+def check_boards(gamedata, boards):
+    boards = np.asarray(boards, dtype=bool)
+    if boards.ndim == 2:
+        boards = boards[np.newaxis]
+    if boards.shape[1:] != (gamedata.height, gamedata.width):
+        raise ValueError(f'boards are {boards.shape[2]}x{boards.shape[1]}, puzzle is {gamedata.width}x{gamedata.height}')
+    bad_rows = line_mismatches(boards, gamedata.row_clues)
+    bad_cols = line_mismatches(boards.transpose(0, 2, 1), gamedata.col_clues)
+    return ~(bad_rows.any(axis=1) | bad_cols.any(axis=1)), bad_rows, bad_cols
+
+
+def offending_lines(bad_rows, bad_cols, index):
+    return ([('row', int(row)) for row in np.flatnonzero(bad_rows[index])] +
+            [('col', int(col)) for col in np.flatnonzero(bad_cols[index])])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check a stack of submitted boards against a puzzle.')
+    parser.add_argument('boards', help='.npy file holding an (N, height, width) boolean array')
+    parser.add_argument('--pack', help='puzzle pack to load the puzzle from')
+    parser.add_argument('--puzzle', default='Kiwi', help='GameData puzzle name, or id/name of a --pack entry')
+    args = parser.parse_args(argv)
+
+    if args.pack:
+        from pack import Pack
+        with Pack(args.pack) as pack:
+            gamedata = pack.load(args.puzzle)
+    else:
+        gamedata = getattr(GameData, args.puzzle)
+    boards = np.load(args.boards)
+    started = perf_counter()
+    passed, bad_rows, bad_cols = check_boards(gamedata, boards)
+    elapsed = perf_counter() - started
+    for index in np.flatnonzero(~passed):
+        print(f'{index}\t' + ' '.join(f'{kind}{line}' for kind, line in offending_lines(bad_rows, bad_cols, index)))
+    print(f'{int(passed.sum())}/{len(passed)} boards pass, checked in {elapsed * 1000:.1f} ms '
+          f'({len(passed) / max(elapsed, 1e-9):.0f} boards/s)', file=sys.stderr)
+    return 0 if passed.all() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import sys
+from time import perf_counter
+
+import numpy as np
+
+from pack import write_pack
+from puzzle import Puzzle
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+NETPBM_EXTENSIONS = ('.pbm', '.pgm')
+IMAGE_EXTENSIONS = NETPBM_EXTENSIONS + ('.png',)
+
+
+def read_header(data, fields):
+    values = []
+    offset = 2
+    while len(values) < fields:
+        while data[offset:offset + 1].isspace() or data[offset:offset + 1] == b'#':
+            if data[offset:offset + 1] == b'#':
+                offset = data.index(b'\n', offset)
+            offset += 1
+        end = offset
+        while data[end:end + 1].isdigit():
+            end += 1
+        values.append(int(data[offset:end]))
+        offset = end
+    return values, offset + 1
+
+
+def read_netpbm(path, threshold=0.5):
+    with open(path, 'rb') as image_file:
+        data = image_file.read()
+    magic = data[:2]
+    if magic in (b'P1', b'P4'):
+        (width, height), offset = read_header(data, 2)
+        if magic == b'P1':
+            body = b''.join(line.split(b'#')[0] for line in data[offset:].splitlines())
+            digits = np.frombuffer(bytes(body.translate(None, b' \t\r\n\v\f')), dtype=np.uint8)
+            return (digits[:width * height] - ord('0')).reshape(height, width).astype(bool)
+        packed = np.frombuffer(data, dtype=np.uint8, count=height * ((width + 7) // 8), offset=offset)
+        return np.unpackbits(packed.reshape(height, -1), axis=1)[:, :width].astype(bool)
+    if magic in (b'P2', b'P5'):
+        (width, height, maxval), offset = read_header(data, 3)
+        if magic == b'P2':
+            body = b' '.join(line.split(b'#')[0] for line in data[offset:].splitlines())
+            pixels = np.array(body.split()[:width * height], dtype=np.int64)
+        else:
+            dtype = np.uint8 if maxval < 256 else np.dtype('>u2')
+            pixels = np.frombuffer(data, dtype=dtype, count=width * height, offset=offset)
+        return pixels.reshape(height, width) < maxval * threshold
+    raise ValueError(f'{path} is not a PBM or PGM image')
+
+
+def read_image(path, threshold=0.5):
+    if path.lower().endswith(NETPBM_EXTENSIONS):
+        return read_netpbm(path, threshold)
+    if Image is None:
+        raise RuntimeError(f'reading {path} needs Pillow (pip install pillow)')
+    with Image.open(path) as image:
+        return np.asarray(image.convert('L')) < 255 * threshold
+
+
+def line_runs(bits):
+    bits = np.asarray(bits, dtype=bool)
+    padded = np.zeros((bits.shape[0], bits.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = bits
+    edges = np.diff(padded, axis=1)
+    lines, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    counts = np.bincount(lines, minlength=bits.shape[0])
+    runs = np.split(ends - starts, np.cumsum(counts)[:-1])
+    return [tuple(run.tolist()) or (0,) for run in runs]
+
+
+def bits_to_puzzle(bits, name=None):
+    bits = np.asarray(bits, dtype=bool)
+    height, width = bits.shape
+    return Puzzle(name, height, width, line_runs(bits), line_runs(bits.T))
+
+
+def image_to_puzzle(path, threshold=0.5, name=None):
+    if name is None:
+        name = os.path.splitext(os.path.basename(path))[0]
+    return bits_to_puzzle(read_image(path, threshold), name)
+
+
+def image_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for filename in sorted(os.listdir(path)):
+                if filename.lower().endswith(IMAGE_EXTENSIONS):
+                    yield os.path.join(path, filename)
+        else:
+            yield path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert black and white images into puzzles.')
+    parser.add_argument('paths', nargs='+', help='PBM/PGM/PNG images or folders of images')
+    parser.add_argument('--threshold', type=float, default=0.5, help='pixels darker than this fraction of white are filled')
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument('--pack', help='write the puzzles to this pack')
+    output.add_argument('--json', help='write the puzzles to this JSON file')
+    args = parser.parse_args(argv)
+
+    started = perf_counter()
+    puzzles = [image_to_puzzle(path, args.threshold) for path in image_paths(args.paths)]
+    if args.pack:
+        write_pack(args.pack, puzzles)
+    else:
+        with open(args.json, 'w') as json_file:
+            json.dump([puzzle.to_dict() for puzzle in puzzles], json_file)
+    print(f'converted {len(puzzles)} images in {perf_counter() - started:.2f}s', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,154 @@
+import argparse
+import json
+import os
+import random
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from time import perf_counter
+
+from puzzle import Puzzle
+from solver import SearchState, SolveResult, Solver
+
+
+STYLES = ('random', 'noise')
+DIFFICULTIES = ('line', 'search')
+NOISE_SCALE = 4
+
+
+def random_bits(height, width, density, rng):
+    return [[rng.random() < density for _ in range(width)] for _ in range(height)]
+
+
+def noise_bits(height, width, density, rng):
+    coarse = [[rng.random() for _ in range(width // NOISE_SCALE + 2)] for _ in range(height // NOISE_SCALE + 2)]
+    values = []
+    for row in range(height):
+        y, fy = divmod(row / NOISE_SCALE, 1)
+        top, bottom = coarse[int(y)], coarse[int(y) + 1]
+        line = []
+        for col in range(width):
+            x, fx = divmod(col / NOISE_SCALE, 1)
+            x = int(x)
+            upper = top[x] + (top[x + 1] - top[x]) * fx
+            lower = bottom[x] + (bottom[x + 1] - bottom[x]) * fx
+            line.append(upper + (lower - upper) * fy + rng.random() * 0.1)
+        values.append(line)
+    ranked = sorted(value for line in values for value in line)
+    cutoff = ranked[min(int(len(ranked) * (1 - density)), len(ranked) - 1)]
+    return [[value >= cutoff for value in line] for line in values]
+
+
+SAMPLERS = {
+    'random': random_bits,
+    'noise': noise_bits}
+
+
+def classify(puzzle, timeout=None, search=True):
+    solver = Solver(puzzle)
+    state = SearchState(puzzle.height, puzzle.width)
+    lines = [('row', row) for row in range(puzzle.height)] + [('col', col) for col in range(puzzle.width)]
+    if not solver.propagate(state, deque(lines), SolveResult()):
+        return None
+    if solver.pick_cell(state) is None:
+        return 'line'
+    if not search:
+        return None
+    result = solver.solve(max_solutions=2, timeout=timeout)
+    return 'search' if result.is_unique() else None
+
+
+def generate_candidate(index, seed, height, width, density, style, difficulty, timeout):
+    rng = random.Random(seed * 1000003 + index)
+    puzzle = Puzzle.from_bits(f'Generated{height}x{width}_{seed}_{index}', SAMPLERS[style](height, width, density, rng))
+    return puzzle if classify(puzzle, timeout, difficulty == 'search') else None
+
+
+def generate_chunk(indexes, seed, height, width, density, style, difficulty, timeout):
+    return [(index, generate_candidate(index, seed, height, width, density, style, difficulty, timeout)) for index in indexes]
+
+
+def generate(count, height, width, density=0.6, style='random', difficulty='line', seed=0,
+             workers=None, chunksize=16, timeout=5.0, max_candidates=None):
+    accepted = []
+    candidates = 0
+    done = {}
+    next_chunk = 0
+    scanned = 0
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        while len(accepted) < count:
+            while len(pending) < workers * 2 and (max_candidates is None or next_chunk * chunksize < max_candidates):
+                end = (next_chunk + 1) * chunksize
+                indexes = range(next_chunk * chunksize, end if max_candidates is None else min(end, max_candidates))
+                pending[executor.submit(generate_chunk, indexes, seed, height, width, density, style, difficulty, timeout)] = next_chunk
+                next_chunk += 1
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                done[pending.pop(future)] = future.result()
+            while scanned in done and len(accepted) < count:
+                for index, puzzle in done.pop(scanned):
+                    if len(accepted) == count:
+                        break
+                    candidates += 1
+                    if puzzle is not None:
+                        accepted.append(puzzle)
+                scanned += 1
+        for future in pending:
+            future.cancel()
+    return accepted, candidates
+
+
+def gamedata_source(puzzles):
+    blocks = []
+    for puzzle in puzzles:
+        lines = [f'class {puzzle.name}:', f'    height = {puzzle.height}', f'    width = {puzzle.width}']
+        for attribute, clues in (('row_clues', puzzle.row_clues), ('col_clues', puzzle.col_clues)):
+            prefix = f'    {attribute} = ['
+            indent = ' ' * len(prefix)
+            lines.append(prefix + f',\n{indent}'.join(repr(tuple(clue)) for clue in clues) + ']')
+        blocks.append('\n'.join(lines))
+    return '\n\n'.join(blocks) + '\n'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate random puzzles with exactly one solution.')
+    parser.add_argument('count', type=int, help='number of puzzles to generate')
+    parser.add_argument('--size', type=int, nargs=2, default=(15, 15), metavar=('HEIGHT', 'WIDTH'))
+    parser.add_argument('--density', type=float, default=0.6, help='target fraction of filled cells')
+    parser.add_argument('--style', choices=STYLES, default='random', help='independent random cells or smooth noise shapes')
+    parser.add_argument('--difficulty', choices=DIFFICULTIES, default='line',
+                        help='line: solvable by line logic alone; search: any unique puzzle, branching allowed')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--chunksize', type=int, default=16, help='candidates dispatched per task')
+    parser.add_argument('--timeout', type=float, default=5.0,
+                        help='solver time limit per candidate for --difficulty search; random half-filled boards up to '
+                             'about 30x30 solve within it, larger ones may time out and be rejected')
+    parser.add_argument('--max-candidates', type=int, default=None, help='give up after this many candidates')
+    parser.add_argument('--output', help='write a JSON puzzle file, or a pack if the name ends in .pxp (default: GameData classes on stdout)')
+    args = parser.parse_args(argv)
+
+    height, width = args.size
+    started = perf_counter()
+    puzzles, candidates = generate(args.count, height, width, args.density, args.style, args.difficulty, args.seed,
+                                   args.workers, args.chunksize, args.timeout, args.max_candidates)
+    elapsed = perf_counter() - started
+    if args.output and args.output.endswith('.pxp'):
+        from pack import write_pack
+        write_pack(args.output, puzzles)
+    elif args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump([puzzle.to_dict() for puzzle in puzzles], output_file)
+    else:
+        print(gamedata_source(puzzles), end='')
+    print(f'{len(puzzles)} puzzles from {candidates} candidates in {elapsed:.2f}s '
+          f'({len(puzzles) / elapsed:.1f} puzzles/s, {candidates / elapsed:.1f} candidates/s)', file=sys.stderr)
+    return 0 if len(puzzles) == args.count else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+import queue
+import threading
+
+from puzzle import Board, Mark
+from solver import SearchState, settle_line, solve
+
+
+FILLED_CODE = Board.STATE_CODES[Mark.FILLED]
+BLANK_CODE = Board.STATE_CODES[Mark.BLANK]
+HINT_SOLVE_TIMEOUT = 5.0
+
+
+def known_masks(cells, height, width):
+    row_filled = [0] * height
+    row_blank = [0] * height
+    col_filled = [0] * width
+    col_blank = [0] * width
+    for index, code in enumerate(cells):
+        if code == FILLED_CODE or code == BLANK_CODE:
+            row, col = divmod(index, width)
+            if code == FILLED_CODE:
+                row_filled[row] |= 1 << (width - (col + 1))
+                col_filled[col] |= 1 << (height - (row + 1))
+            else:
+                row_blank[row] |= 1 << (width - (col + 1))
+                col_blank[col] |= 1 << (height - (row + 1))
+    return row_filled, row_blank, col_filled, col_blank
+
+
+def lines(board, cells):
+    row_filled, row_blank, col_filled, col_blank = known_masks(cells, board.height, board.width)
+    for row in range(board.height):
+        yield 'row', row, board.row_clues[row], row_filled[row], row_blank[row], board.width
+    for col in range(board.width):
+        yield 'col', col, board.col_clues[col], col_filled[col], col_blank[col], board.height
+
+
+def first_contradiction(board, cells, cancelled=lambda: False):
+    for kind, index, clue, filled, blank, length in lines(board, cells):
+        if cancelled():
+            return None
+        if settle_line(clue, filled, blank, length) is None:
+            return kind, index
+    return False
+
+
+def next_forced_cell(board, cells, cancelled=lambda: False):
+    for kind, index, clue, filled, blank, length in lines(board, cells):
+        if cancelled():
+            return None
+        forced = settle_line(clue, filled, blank, length)
+        if forced is None:
+            return {'contradiction': (kind, index)}
+        for is_filled, new in ((True, forced[0] & ~filled), (False, forced[1] & ~blank)):
+            if new:
+                cross = length - new.bit_length()
+                row, col = (index, cross) if kind == 'row' else (cross, index)
+                return {'row': row, 'col': col, 'filled': is_filled, 'line': (kind, index)}
+    if cancelled():
+        return None
+    state = SearchState(board.height, board.width)
+    state.row_filled, state.row_blank, state.col_filled, state.col_blank = known_masks(cells, board.height, board.width)
+    result = solve(board, max_solutions=1, timeout=HINT_SOLVE_TIMEOUT, state=state, cancelled=cancelled)
+    if result.cancelled:
+        return None
+    if result.solutions:
+        solution = result.solutions[0]
+        for index, code in enumerate(cells):
+            row, col = divmod(index, board.width)
+            if code != FILLED_CODE and code != BLANK_CODE:
+                return {'row': row, 'col': col, 'filled': bool(solution[row] >> (board.width - (col + 1)) & 1), 'line': None}
+    return {}
+
+
+class HintEngine:
+    def __init__(self, board):
+        self.board = board
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.latest = {}
+        self.thread = threading.Thread(target=self.run, name='hints', daemon=True)
+        self.thread.start()
+
+    def submit(self, kind, version, cells):
+        self.latest[kind] = version
+        self.requests.put((kind, version, bytes(cells)))
+
+    def stop(self):
+        self.requests.put(None)
+
+    def run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            kind, version, cells = request
+            if self.latest.get(kind) != version:
+                continue
+
+            def cancelled():
+                return self.latest.get(kind) != version
+
+            if kind == 'hint':
+                result = next_forced_cell(self.board, cells, cancelled)
+            else:
+                result = first_contradiction(self.board, cells, cancelled)
+            if result is not None:
+                self.results.put((kind, version, result))
+
+    def poll(self):
+        while True:
+            try:
+                yield self.results.get_nowait()
+            except queue.Empty:
+                return
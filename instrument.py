@@ -0,0 +1,103 @@
+import cProfile
+import functools
+import os
+import sys
+from time import perf_counter_ns
+
+
+ENV_INSTRUMENT = 'PIXEL_INSTRUMENT'
+ENV_PROFILE = 'PIXEL_PROFILE'
+SUB_BITS = 3
+SUB_BUCKETS = 1 << SUB_BITS
+BUCKETS = 64 * SUB_BUCKETS
+PERCENTILES = (50, 95, 99)
+
+
+def bucket_index(value):
+    if value < SUB_BUCKETS:
+        return value
+    octave = value.bit_length() - SUB_BITS - 1
+    return octave * SUB_BUCKETS + (value >> octave)
+
+
+def bucket_bound(index):
+    if index < SUB_BUCKETS:
+        return index
+    octave, step = divmod(index, SUB_BUCKETS)
+    return ((step + SUB_BUCKETS + 1) << (octave - 1)) - 1
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        self.counts[bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        target = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return min(bucket_bound(index), self.max)
+        return self.max
+
+
+class Instruments:
+    def __init__(self, profile_path=None):
+        self.histograms = {}
+        self.profile_path = profile_path
+        self.profiler = cProfile.Profile() if profile_path else None
+
+    @classmethod
+    def from_environment(cls, enabled=False, profile_path=None):
+        profile_path = profile_path or os.environ.get(ENV_PROFILE)
+        if enabled or profile_path or os.environ.get(ENV_INSTRUMENT):
+            return cls(profile_path)
+        return None
+
+    def install(self, methods):
+        for owner, name, phase in methods:
+            self.wrap(owner, name, phase)
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def wrap(self, owner, name, phase):
+        attribute = owner.__dict__[name]
+        static = isinstance(attribute, staticmethod)
+        function = attribute.__func__ if static else attribute
+        histogram = self.histograms.setdefault(phase, Histogram())
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            started = perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.add(perf_counter_ns() - started)
+
+        setattr(owner, name, staticmethod(timed) if static else timed)
+
+    def report(self):
+        lines = [f'{"phase":<16}{"count":>8}{"mean":>10}' + ''.join(f'{f"p{percent}":>10}' for percent in PERCENTILES) + f'{"max":>10}']
+        for phase, histogram in sorted(self.histograms.items()):
+            if not histogram.count:
+                continue
+            values = [histogram.total / histogram.count] + [histogram.percentile(percent) for percent in PERCENTILES] + [histogram.max]
+            lines.append(f'{phase:<16}{histogram.count:>8}' + ''.join(f'{value / 1000:>8.1f}us' for value in values))
+        return '\n'.join(lines)
+
+    def dump(self, file=sys.stderr):
+        print(self.report(), file=file)
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.profile_path)
+            print(f'profile written to {self.profile_path}', file=file)
@@ -0,0 +1,139 @@
+import argparse
+import os
+import struct
+import sys
+from time import perf_counter, perf_counter_ns, sleep
+
+from puzzle import Board, Mark, Puzzle
+
+
+MAGIC = b'PXJL'
+VERSION = 1
+HEADER = struct.Struct('<4sHI')
+RECORD = struct.Struct('<QBHHB')
+
+MARK = 0
+PAINT = 1
+SWITCH = 2
+RESET = 3
+START = 4
+
+EVENT_NAMES = {
+    MARK: 'mark',
+    PAINT: 'paint',
+    SWITCH: 'switch',
+    RESET: 'reset',
+    START: 'start'}
+
+
+def read_journal(path):
+    from pack import decode_puzzle
+    with open(path, 'rb') as journal_file:
+        data = journal_file.read()
+    magic, version, length = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f'{path} is not a version {VERSION} move journal')
+    puzzle = decode_puzzle(data, HEADER.size)
+    start = HEADER.size + length
+    end = start + (len(data) - start) // RECORD.size * RECORD.size
+    return puzzle, list(RECORD.iter_unpack(data[start:end])), end
+
+
+class Journal:
+    def __init__(self, path, gamedata=None):
+        self.path = path
+        if gamedata is None:
+            self.puzzle, self.events, end = read_journal(path)
+            self.file = open(path, 'r+b')
+            self.file.truncate(end)
+            self.file.seek(end)
+        else:
+            from pack import encode_puzzle
+            self.puzzle = gamedata if isinstance(gamedata, Puzzle) else Puzzle.from_gamedata(gamedata)
+            self.events = []
+            record = encode_puzzle(self.puzzle)
+            self.file = open(path, 'wb')
+            self.file.write(HEADER.pack(MAGIC, VERSION, len(record)))
+            self.file.write(record)
+            self.file.flush()
+        last = self.events[-1][0] if self.events else 0
+        self.started = perf_counter_ns() - last
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(self, event, row=0, col=0, state=Mark.EMPTY):
+        self.file.write(RECORD.pack(perf_counter_ns() - self.started, event, row, col, Board.STATE_CODES[state]))
+        self.file.flush()
+
+    def elapsed(self):
+        for timestamp, event, _, _, _ in reversed(self.events):
+            if event == START:
+                return (self.events[-1][0] - timestamp) / 1e9
+        return 0.0
+
+    def close(self):
+        if not self.file.closed:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
+
+
+def apply_event(board, mark, event):
+    _, kind, row, col, code = event
+    if kind == MARK:
+        board.mark(row, col, Board.STATES[code])
+    elif kind == PAINT:
+        board.set_state(row, col, Board.STATES[code])
+    elif kind == SWITCH:
+        mark.state = Board.STATES[code]
+    elif kind == RESET:
+        board.reset()
+
+
+def replay(board, mark, events, pace=None):
+    started = perf_counter_ns()
+    for event in events:
+        if pace:
+            delay = event[0] / pace - (perf_counter_ns() - started)
+            if delay > 0:
+                sleep(delay / 1e9)
+        apply_event(board, mark, event)
+    return (perf_counter_ns() - started) / 1e9
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect and replay move journals.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    dump = commands.add_parser('dump', help='print the events in a journal')
+    dump.add_argument('journal')
+    replaying = commands.add_parser('replay', help='replay a journal headlessly through the board logic')
+    replaying.add_argument('journal')
+    replaying.add_argument('--pace', type=float, default=None, help='replay at this multiple of the recorded speed (default: as fast as possible)')
+    replaying.add_argument('--repeat', type=int, default=1, help='replay the journal this many times')
+    args = parser.parse_args(argv)
+
+    puzzle, events, _ = read_journal(args.journal)
+    if args.command == 'dump':
+        print(f'{puzzle.name}\t{puzzle.width}x{puzzle.height}\t{len(events)} events')
+        for timestamp, kind, row, col, code in events:
+            print(f'{timestamp / 1e9:.3f}\t{EVENT_NAMES[kind]}\t{row}\t{col}\t{Board.STATES[code]}')
+        return 0
+
+    elapsed = 0.0
+    for _ in range(args.repeat):
+        board = Board(puzzle)
+        started = perf_counter()
+        replay(board, Mark(), events, args.pace)
+        elapsed += perf_counter() - started
+    total = len(events) * args.repeat
+    print(f'{puzzle.name}: {total} events in {elapsed:.3f}s ({total / max(elapsed, 1e-9):.0f} events/s, '
+          f'{elapsed / max(total, 1) * 1e6:.1f} us/event), solved={board.is_solved()}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
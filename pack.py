@@ -0,0 +1,193 @@
+import argparse
+import mmap
+import struct
+import sys
+
+from puzzle import GameData, Puzzle, load_puzzles
+
+
+MAGIC = b'PXPK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIQQ')
+OFFSET = struct.Struct('<Q')
+NAME_ENTRY = struct.Struct('<QI')
+FNV_OFFSET = 0xcbf29ce484222325
+FNV_PRIME = 0x100000001b3
+
+
+def name_hash(name):
+    value = FNV_OFFSET
+    for byte in name.encode('utf-8'):
+        value = ((value ^ byte) * FNV_PRIME) & 0xffffffffffffffff
+    return value
+
+
+def encode_varint(value, out):
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def encode_puzzle(puzzle):
+    out = bytearray()
+    name = (puzzle.name or '').encode('utf-8')
+    encode_varint(len(name), out)
+    out += name
+    encode_varint(puzzle.height, out)
+    encode_varint(puzzle.width, out)
+    for clue in list(puzzle.row_clues) + list(puzzle.col_clues):
+        runs = [run for run in clue if run]
+        encode_varint(len(runs), out)
+        for run in runs:
+            encode_varint(run, out)
+    return out
+
+
+def decode_puzzle(data, offset):
+    length, offset = decode_varint(data, offset)
+    name = bytes(data[offset:offset + length]).decode('utf-8')
+    offset += length
+    height, offset = decode_varint(data, offset)
+    width, offset = decode_varint(data, offset)
+    clues = []
+    for _ in range(height + width):
+        count, offset = decode_varint(data, offset)
+        runs = []
+        for _ in range(count):
+            run, offset = decode_varint(data, offset)
+            runs.append(run)
+        clues.append(tuple(runs) or (0,))
+    return Puzzle(name, height, width, clues[:height], clues[height:])
+
+
+def write_pack(path, puzzles):
+    records = bytearray()
+    offsets = []
+    names = []
+    for index, puzzle in enumerate(puzzles):
+        offsets.append(HEADER.size + len(records))
+        names.append((name_hash(puzzle.name or ''), index))
+        records += encode_puzzle(puzzle)
+    index_offset = HEADER.size + len(records)
+    names_offset = index_offset + OFFSET.size * len(offsets)
+    with open(path, 'wb') as pack_file:
+        pack_file.write(HEADER.pack(MAGIC, VERSION, 0, len(offsets), index_offset, names_offset))
+        pack_file.write(records)
+        for offset in offsets:
+            pack_file.write(OFFSET.pack(offset))
+        for entry in sorted(names):
+            pack_file.write(NAME_ENTRY.pack(*entry))
+    return len(offsets)
+
+
+class Pack:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.count, self.index_offset, self.names_offset = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f'{path} is not a version {VERSION} puzzle pack')
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def get(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(f'puzzle {index} is not in {self.path}')
+        offset, = OFFSET.unpack_from(self.data, self.index_offset + OFFSET.size * index)
+        return decode_puzzle(self.data, offset)
+
+    def name(self, index):
+        offset, = OFFSET.unpack_from(self.data, self.index_offset + OFFSET.size * index)
+        length, offset = decode_varint(self.data, offset)
+        return bytes(self.data[offset:offset + length]).decode('utf-8')
+
+    def find(self, name):
+        target = name_hash(name)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if NAME_ENTRY.unpack_from(self.data, self.names_offset + NAME_ENTRY.size * middle)[0] < target:
+                low = middle + 1
+            else:
+                high = middle
+        while low < self.count:
+            value, index = NAME_ENTRY.unpack_from(self.data, self.names_offset + NAME_ENTRY.size * low)
+            if value != target:
+                break
+            if self.name(index) == name:
+                return index
+            low += 1
+        return None
+
+    def load(self, key):
+        if isinstance(key, int) or key.isdigit():
+            return self.get(int(key))
+        index = self.find(key)
+        if index is None:
+            raise KeyError(f'no puzzle named {key!r} in {self.path}')
+        return self.get(index)
+
+    def __getitem__(self, index):
+        return self.get(index)
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self.get(index)
+
+
+def gamedata_puzzles():
+    return [Puzzle.from_gamedata(value) for value in vars(GameData).values() if isinstance(value, type)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build and inspect puzzle packs.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    export = commands.add_parser('export', help='write the built-in GameData puzzles to a pack')
+    export.add_argument('pack')
+    build = commands.add_parser('build', help='write JSON puzzle files to a pack')
+    build.add_argument('pack')
+    build.add_argument('paths', nargs='+')
+    listing = commands.add_parser('list', help='list the puzzles in a pack')
+    listing.add_argument('pack')
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        print(f'wrote {write_pack(args.pack, gamedata_puzzles())} puzzles to {args.pack}')
+    elif args.command == 'build':
+        puzzles = [puzzle for path in args.paths for puzzle in load_puzzles(path)]
+        print(f'wrote {write_pack(args.pack, puzzles)} puzzles to {args.pack}')
+    else:
+        with Pack(args.pack) as pack:
+            for index in range(len(pack)):
+                puzzle = pack.get(index)
+                print(f'{index}\t{puzzle.name}\t{puzzle.width}x{puzzle.height}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,82 +1,14 @@
+import argparse
+import sys
 import tkinter as tk
-from itertools import permutations
-from functools import reduce
-from datetime import datetime
-from tkinter import messagebox
-
-
-class GameData:
-    class Kiwi:
-        height = 15
-        width = 15
-        row_clues = [(1, 1),
-                     (1, 1),
-                     (2, 1, 1, 2),
-                     (3, 3),
-                     (4, 3, 1),
-                     (2, 1, 4),
-                     (4, 1, 2),
-                     (5, 1, 1),
-                     (8,),
-                     (1, 6),
-                     (1, 3),
-                     (3, 2),
-                     (2, 1),
-                     (3, 1),
-                     (2, 1, 1, 1)]
-        col_clues = [(1,),
-                     (1,),
-                     (1,),
-                     (1, 1),
-                     (1, 3),
-                     (2,),
-                     (1, 4),
-                     (1, 4, 1),
-                     (4, 1, 1),
-                     (1, 4, 1, 1),
-                     (2, 2, 3, 4),
-                     (5, 2, 3),
-                     (3, 4, 1),
-                     (1, 2, 6),
-                     (1, 6, 1)]
-
-    class Monk:
-        height = 10
-        width = 10
-        row_clues = [(7,),
-                     (3, 1, 1),
-                     (2, 1, 1, 1),
-                     (1, 1, 3),
-                     (1, 4, 1),
-                     (3, 2),
-                     (3, 3),
-                     (6, 1),
-                     (2, 2),
-                     (5, 2, 1)]
-        col_clues = [(1, 2, 1),
-                     (8, 1),
-                     (3, 5),
-                     (1, 1, 3),
-                     (1, 1, 1, 1, 1),
-                     (2, 2, 1),
-                     (1, 1, 1, 1, 1),
-                     (1, 1, 2, 2),
-                     (8,),
-                     (1, 1, 1)]
-
-    class Candle:
-        height = 5
-        width = 5
-        row_clues = [(1, 1),
-                     (1, 1, 1),
-                     (5,),
-                     (1,),
-                     (3,)]
-        col_clues = [(3,),
-                     (1, 1),
-                     (5,),
-                     (1, 1),
-                     (2,)]
+from time import monotonic, perf_counter
+from tkinter import messagebox, ttk
+from hints import HintEngine
+from instrument import Instruments
+from journal import MARK, PAINT, RESET, START, SWITCH, Journal, replay
+import puzzle
+from puzzle import GameData, Mark, Board
+from stats import STATS_PATH, StatsStore
 
 
 class Clues(tk.Frame):
@@ -84,10 +16,13 @@ class Clues(tk.Frame):
     NORMAL_COLOR = 'black'
     SOLVED = ('Helvetica', 12)
     SOLVED_COLOR = 'gray70'
+    ERROR = ('Helvetica', 12, 'bold italic')
+    ERROR_COLOR = 'red'
 
     STATE_COLOR_MAP = {
         NORMAL: NORMAL_COLOR,
-        SOLVED: SOLVED_COLOR}
+        SOLVED: SOLVED_COLOR,
+        ERROR: ERROR_COLOR}
 
     def __init__(self, game, root, container):
         self.game = game
@@ -98,17 +33,24 @@ class Clues(tk.Frame):
         super(Clues, self).__init__(container)
 
     def set_normal(self):
-        self.state = Clues.NORMAL
-        self.update_labels()
+        self.set_state(Clues.NORMAL)
 
     def set_solved(self):
-        self.state = Clues.SOLVED
-        self.update_labels()
+        self.set_state(Clues.SOLVED)
+
+    def set_error(self):
+        self.set_state(Clues.ERROR)
+
+    def set_state(self, state):
+        if state != self.state:
+            self.state = state
+            self.game.schedule_repaint(self)
 
     def update_labels(self):
         if self.labels:
             for enum in self.labels.keys():
                 self.labels[enum].config(font=self.state, foreground=Clues.STATE_COLOR_MAP[self.state])
+                self.game.tk_calls += 1
 
     def is_solved(self):
         return self.state == Clues.SOLVED
@@ -137,62 +79,6 @@ class ColClues(Clues):
             else:
                 self.labels[enum].pack(side=tk.TOP, fill=tk.X, expand=False, pady=2)
 
-class Mark:
-    EMPTY = 'white'
-    FILLED = 'black'
-    POSSIBLE = 'gray70'
-    BLANK = 'IndianRed1'
-
-    SWITCH_MAP = {
-        POSSIBLE: BLANK,
-        BLANK: POSSIBLE}
-
-    MARK_STATE_CHANGE_MAP = {
-        FILLED: {
-            EMPTY: FILLED,
-            FILLED: EMPTY,
-            POSSIBLE: FILLED,
-            BLANK: EMPTY},
-        POSSIBLE: {
-            EMPTY: POSSIBLE,
-            FILLED: FILLED,
-            POSSIBLE: EMPTY,
-            BLANK: BLANK},
-        BLANK: {
-            EMPTY: BLANK,
-            FILLED: EMPTY,
-            POSSIBLE: BLANK,
-            BLANK: EMPTY}}
-
-    MARK_TEXT_MAP = {
-        FILLED: 'Mark Cell',
-        POSSIBLE: 'Mark Possible',
-        BLANK: 'Mark Blank'}
-
-    STATE_VALUE_MAP = {
-        EMPTY: 0,
-        FILLED: 1,
-        POSSIBLE: 0,
-        BLANK: 0}
-
-    STATE_SOLVED_MAP = {
-        EMPTY: EMPTY,
-        FILLED: FILLED,
-        POSSIBLE: EMPTY,
-        BLANK: EMPTY}
-
-    def __init__(self):
-        self.state = Mark.POSSIBLE
-
-    def switch_state(self):
-        self.state = Mark.SWITCH_MAP[self.state]
-
-    def get_mark_text(self):
-        return Mark.MARK_TEXT_MAP[Mark.FILLED]
-
-    def get_state_text(self):
-        return Mark.MARK_TEXT_MAP[self.state]
-
 class Cell(tk.Frame):
     BORDER_GRAY = 'gray50'
     BORDER_BLACK = 'black'
@@ -279,65 +165,540 @@ class Cell(tk.Frame):
         self.borders['se'].pack(side=tk.LEFT)
         bottom_frame.pack(side=tk.TOP, fill=tk.X, expand=True)
 
-    def mark_filled(self, event=None):
-        self.state = Mark.MARK_STATE_CHANGE_MAP[Mark.FILLED][self.state]
-        self.update()
+    def paint(self, state):
+        if state != self.state:
+            self.state = state
+            self.frame.config(background=self.state)
+            self.game.tk_calls += 1
 
-    def mark_dynamic(self, event=None):
-        self.state = Mark.MARK_STATE_CHANGE_MAP[self.game.mark.state][self.state]
-        self.update()
+    def press_filled(self, event=None):
+        self.game.begin_stroke(self.row, self.col, Mark.FILLED)
 
-    def update(self):
-        self.frame.config(background=self.state)
-        self.game.update()
+    def press_dynamic(self, event=None):
+        self.game.begin_stroke(self.row, self.col, self.game.mark.state)
+
+    def drag(self, event):
+        x = event.x_root - self.game.grid_frame.winfo_rootx()
+        y = event.y_root - self.game.grid_frame.winfo_rooty()
+        self.game.extend_stroke(y // Game.CELL_SIZE, x // Game.CELL_SIZE)
 
-    def value(self):
-        return Mark.STATE_VALUE_MAP[self.state]
+    def release(self, event=None):
+        self.game.end_stroke()
 
     def set_solved(self, event=None):
-        self.state = Mark.STATE_SOLVED_MAP[self.state]
-        self.frame.config(background=self.state)
-        self.frame.unbind('<Button-1>')
-        self.frame.unbind('<Button-3>')
+        self.paint(self.game.board.state(self.row, self.col))
+        self.unbind_input()
 
     def reset(self, event=None):
+        self.paint(Mark.EMPTY)
+        self.unbind_input()
+
+    def start(self, event=None):
+        self.frame.bind('<Button-1>', self.press_filled)
+        self.frame.bind('<Button-3>', self.press_dynamic)
+        self.frame.bind('<B1-Motion>', self.drag)
+        self.frame.bind('<B3-Motion>', self.drag)
+        self.frame.bind('<ButtonRelease-1>', self.release)
+        self.frame.bind('<ButtonRelease-3>', self.release)
+
+    def unbind_input(self):
+        for sequence in ('<Button-1>', '<Button-3>', '<B1-Motion>', '<B3-Motion>', '<ButtonRelease-1>', '<ButtonRelease-3>'):
+            self.frame.unbind(sequence)
+
+
+class CellFrame(tk.Frame):
+    def __init__(self, game, root, container, height, width):
+        self.game = game
+        self.root = root
+        self.container = container
+        self.height = height
+        self.width = width
+        super(CellFrame, self).__init__(container)
+        for row in range(self.height):
+            self.rowconfigure(row, minsize=Game.CELL_SIZE, weight=0)
+        for col in range(self.width):
+            self.columnconfigure(col, minsize=Game.CELL_SIZE, weight=0)
+        self.cells = {}
+
+    def build(self):
+        for row in range(self.height):
+            self.cells[row] = {}
+            for col in range(self.width):
+                self.cells[row][col] = Cell(self.game, self.root, self, row, col, self.height, self.width)
+                self.cells[row][col].grid(row=row, column=col, sticky=tk.NSEW)
+            yield
+
+    def paint(self, row, col, state):
+        self.cells[row][col].paint(state)
+
+    def start(self):
+        for row in range(self.height):
+            for col in range(self.width):
+                self.cells[row][col].start()
+
+    def reset(self):
+        for row in range(self.height):
+            for col in range(self.width):
+                self.cells[row][col].reset()
+
+    def set_solved(self):
+        for row in range(self.height):
+            for col in range(self.width):
+                self.cells[row][col].set_solved()
+
+
+class CanvasCell:
+    def __init__(self, game, canvas, row, col):
+        self.game = game
+        self.canvas = canvas
+        self.row = row
+        self.col = col
         self.state = Mark.EMPTY
-        self.frame.config(background=self.state)
-        self.frame.unbind('<Button-1>')
-        self.frame.unbind('<Button-3>')
+        self.active = False
+        x = col * Game.CELL_SIZE
+        y = row * Game.CELL_SIZE
+        self.item = canvas.create_rectangle(x + 1, y + 1, x + Game.CELL_SIZE - 1, y + Game.CELL_SIZE - 1,
+                                            fill=self.state, outline='')
+
+    def paint(self, state):
+        if state != self.state:
+            self.state = state
+            self.canvas.itemconfig(self.item, fill=self.state)
+            self.game.tk_calls += 1
+
+    def set_solved(self, event=None):
+        self.paint(self.game.board.state(self.row, self.col))
+        self.active = False
+
+    def reset(self, event=None):
+        self.paint(Mark.EMPTY)
+        self.active = False
 
     def start(self, event=None):
-        self.frame.bind('<Button-1>', self.mark_filled)
-        self.frame.bind('<Button-3>', self.mark_dynamic)
+        self.active = True
+
+
+def separator_color(index, length):
+    if length > 10 and length % 10 == 0 and index % 10 == 0:
+        return Cell.BORDER_RED
+    return Cell.BORDER_BLUE
+
+
+class CellCanvas(tk.Canvas):
+    def __init__(self, game, root, container, height, width):
+        self.game = game
+        self.root = root
+        self.container = container
+        self.height = height
+        self.width = width
+        super(CellCanvas, self).__init__(container, height=Game.CELL_SIZE * height, width=Game.CELL_SIZE * width,
+                                         background=Cell.BORDER_GRAY, highlightthickness=0, borderwidth=0)
+        self.cells = {}
+        self.bind('<Button-1>', self.click_filled)
+        self.bind('<Button-3>', self.click_dynamic)
+        self.bind('<B1-Motion>', self.drag)
+        self.bind('<B3-Motion>', self.drag)
+        self.bind('<ButtonRelease-1>', self.release)
+        self.bind('<ButtonRelease-3>', self.release)
+
+    def build(self):
+        for row in range(self.height):
+            self.cells[row] = {}
+            for col in range(self.width):
+                self.cells[row][col] = CanvasCell(self.game, self, row, col)
+            yield
+
+        for row in range(5, self.height, 5):
+            self.draw_separator(row, self.height, 0, row * Game.CELL_SIZE, self.width * Game.CELL_SIZE, row * Game.CELL_SIZE)
+        for col in range(5, self.width, 5):
+            self.draw_separator(col, self.width, col * Game.CELL_SIZE, 0, col * Game.CELL_SIZE, self.height * Game.CELL_SIZE)
+
+    def draw_separator(self, index, length, x0, y0, x1, y1):
+        self.create_line(x0, y0, x1, y1, fill=separator_color(index, length), width=2)
+
+    def paint(self, row, col, state):
+        self.cells[row][col].paint(state)
+
+    def start(self):
+        for row in range(self.height):
+            for col in range(self.width):
+                self.cells[row][col].start()
+
+    def reset(self):
+        for row in range(self.height):
+            for col in range(self.width):
+                self.cells[row][col].reset()
+
+    def set_solved(self):
+        for row in range(self.height):
+            for col in range(self.width):
+                self.cells[row][col].set_solved()
+
+    def cell_at(self, x, y):
+        row = int(self.canvasy(y)) // Game.CELL_SIZE
+        col = int(self.canvasx(x)) // Game.CELL_SIZE
+        if 0 <= row < self.height and 0 <= col < self.width:
+            cell = self.cells[row][col]
+            if cell.active:
+                return cell
+        return None
+
+    def click_filled(self, event):
+        cell = self.cell_at(event.x, event.y)
+        if cell is not None:
+            self.game.begin_stroke(cell.row, cell.col, Mark.FILLED)
+
+    def click_dynamic(self, event):
+        cell = self.cell_at(event.x, event.y)
+        if cell is not None:
+            self.game.begin_stroke(cell.row, cell.col, self.game.mark.state)
+
+    def drag(self, event):
+        self.game.extend_stroke(int(self.canvasy(event.y)) // Game.CELL_SIZE, int(self.canvasx(event.x)) // Game.CELL_SIZE)
+
+    def release(self, event):
+        self.game.end_stroke()
+
+
+class CanvasClues:
+    def __init__(self, game, view, kind, index, clues):
+        self.game = game
+        self.view = view
+        self.kind = kind
+        self.index = index
+        self.clues = clues
+        self.state = Clues.NORMAL
+
+    def set_normal(self):
+        self.set_state(Clues.NORMAL)
+
+    def set_solved(self):
+        self.set_state(Clues.SOLVED)
+
+    def set_error(self):
+        self.set_state(Clues.ERROR)
+
+    def set_state(self, state):
+        if state != self.state:
+            self.state = state
+            self.game.schedule_repaint(self)
+
+    def update_labels(self):
+        self.view.paint_clues(self)
+
+    def is_solved(self):
+        return self.state == Clues.SOLVED
+
+    def text(self):
+        separator = ' ' if self.kind == 'row' else '\n'
+        return separator.join(str(clue) for clue in self.clues)
+
+
+class ViewportGrid(tk.Frame):
+    ZOOM_SIZES = (8, 12, 16, 24, 32, 48)
+    VIEWPORT_SIZE = 640
+
+    def __init__(self, game, root, container, board):
+        self.game = game
+        self.root = root
+        self.container = container
+        self.board = board
+        self.height = board.height
+        self.width = board.width
+        self.active = False
+        super(ViewportGrid, self).__init__(container)
+
+        fits = [size for size in ViewportGrid.ZOOM_SIZES
+                if size * max(self.height, self.width) <= ViewportGrid.VIEWPORT_SIZE and size <= Game.CELL_SIZE]
+        self.zoom = ViewportGrid.ZOOM_SIZES.index(fits[-1] if fits else 16)
+
+        self.row_clues = {row: CanvasClues(game, self, 'row', row, clues) for row, clues in enumerate(board.row_clues)}
+        self.col_clues = {col: CanvasClues(game, self, 'col', col, clues) for col, clues in enumerate(board.col_clues)}
+        self.row_chars = max(len(clues.text()) for clues in self.row_clues.values())
+        self.col_lines = max(len(clues.clues) for clues in self.col_clues.values())
+
+        self.row_canvas = tk.Canvas(self, highlightthickness=0, borderwidth=0)
+        self.col_canvas = tk.Canvas(self, highlightthickness=0, borderwidth=0)
+        self.canvas = tk.Canvas(self, background=Cell.BORDER_GRAY, highlightthickness=0, borderwidth=0)
+        self.xscroll = tk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.xview)
+        self.yscroll = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.canvas.config(xscrollcommand=self.xscroll.set, yscrollcommand=self.yscroll.set)
+        self.col_canvas.grid(row=0, column=1, sticky=tk.NSEW)
+        self.row_canvas.grid(row=1, column=0, sticky=tk.NSEW)
+        self.canvas.grid(row=1, column=1, sticky=tk.NSEW)
+        self.yscroll.grid(row=1, column=2, sticky=tk.NS)
+        self.xscroll.grid(row=2, column=1, sticky=tk.EW)
+
+        self.cells = {}
+        self.row_texts = {}
+        self.col_texts = {}
+        self.separators = []
+
+        self.canvas.bind('<Button-1>', self.click_filled)
+        self.canvas.bind('<Button-3>', self.click_dynamic)
+        self.canvas.bind('<B1-Motion>', self.drag)
+        self.canvas.bind('<B3-Motion>', self.drag)
+        self.canvas.bind('<ButtonRelease-1>', self.release)
+        self.canvas.bind('<ButtonRelease-3>', self.release)
+        self.canvas.bind('<Configure>', self.refresh)
+        for widget in (self.canvas, self.row_canvas, self.col_canvas):
+            widget.bind('<Control-MouseWheel>', self.wheel_zoom)
+            widget.bind('<Control-Button-4>', self.zoom_in)
+            widget.bind('<Control-Button-5>', self.zoom_out)
+            widget.bind('<Shift-Button-4>', lambda event: self.xview('scroll', -1, 'units'))
+            widget.bind('<Shift-Button-5>', lambda event: self.xview('scroll', 1, 'units'))
+        self.apply_zoom()
+
+    def build(self):
+        yield
+
+    def clue_font(self, state):
+        return (state[0], max(6, self.cell_size * 3 // 8)) + state[2:]
+
+    def apply_zoom(self, center=None):
+        self.cell_size = size = ViewportGrid.ZOOM_SIZES[self.zoom]
+        font_size = max(6, size * 3 // 8)
+        grid_width = size * self.width
+        grid_height = size * self.height
+        row_width = self.row_chars * font_size * 3 // 4 + 8
+        col_height = self.col_lines * font_size * 3 // 2 + 8
+        self.canvas.config(width=min(grid_width, ViewportGrid.VIEWPORT_SIZE), height=min(grid_height, ViewportGrid.VIEWPORT_SIZE),
+                           scrollregion=(0, 0, grid_width, grid_height),
+                           xscrollincrement=size, yscrollincrement=size)
+        self.row_canvas.config(width=row_width, height=min(grid_height, ViewportGrid.VIEWPORT_SIZE),
+                               scrollregion=(0, 0, row_width, grid_height), yscrollincrement=size)
+        self.col_canvas.config(width=min(grid_width, ViewportGrid.VIEWPORT_SIZE), height=col_height,
+                               scrollregion=(0, 0, grid_width, col_height), xscrollincrement=size)
+        for canvas in (self.canvas, self.row_canvas, self.col_canvas):
+            canvas.delete(tk.ALL)
+        self.cells = {}
+        self.row_texts = {}
+        self.col_texts = {}
+        self.separators = []
+        if center is not None:
+            self.xview('moveto', max(0.0, center[0] - self.view_fraction(self.width) / 2))
+            self.yview('moveto', max(0.0, center[1] - self.view_fraction(self.height) / 2))
+        else:
+            self.refresh()
+
+    def view_fraction(self, length):
+        return min(1.0, ViewportGrid.VIEWPORT_SIZE / (self.cell_size * length))
+
+    def xview(self, *args):
+        self.canvas.xview(*args)
+        self.col_canvas.xview_moveto(self.canvas.xview()[0])
+        self.refresh()
+
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self.row_canvas.yview_moveto(self.canvas.yview()[0])
+        self.refresh()
+
+    def zoom_in(self, event=None):
+        self.set_zoom(self.zoom + 1)
+        return 'break'
+
+    def zoom_out(self, event=None):
+        self.set_zoom(self.zoom - 1)
+        return 'break'
+
+    def wheel_zoom(self, event):
+        self.set_zoom(self.zoom + (1 if event.delta > 0 else -1))
+        return 'break'
+
+    def set_zoom(self, zoom):
+        zoom = min(max(zoom, 0), len(ViewportGrid.ZOOM_SIZES) - 1)
+        if zoom != self.zoom:
+            left, right = self.canvas.xview()
+            top, bottom = self.canvas.yview()
+            self.zoom = zoom
+            self.apply_zoom(center=((left + right) / 2, (top + bottom) / 2))
+
+    def visible(self):
+        size = self.cell_size
+        view_width = max(self.canvas.winfo_width(), int(self.canvas.cget('width')))
+        view_height = max(self.canvas.winfo_height(), int(self.canvas.cget('height')))
+        left = int(self.canvas.canvasx(0))
+        top = int(self.canvas.canvasy(0))
+        rows = range(max(0, top // size), min(self.height, (top + view_height) // size + 1))
+        cols = range(max(0, left // size), min(self.width, (left + view_width) // size + 1))
+        return rows, cols
+
+    def refresh(self, event=None):
+        size = self.cell_size
+        rows, cols = self.visible()
+        wanted = {(row, col) for row in rows for col in cols}
+        for key in [key for key in self.cells if key not in wanted]:
+            self.canvas.delete(self.cells.pop(key))
+        for row, col in wanted:
+            if (row, col) not in self.cells:
+                x = col * size
+                y = row * size
+                self.cells[(row, col)] = self.canvas.create_rectangle(x + 1, y + 1, x + size - 1, y + size - 1, outline='',
+                                                                      fill=self.board.state(row, col))
+
+        for item in self.separators:
+            self.canvas.delete(item)
+        self.separators = []
+        left, right = cols.start * size, cols.stop * size
+        top, bottom = rows.start * size, rows.stop * size
+        for row in range(max(5, rows.start - rows.start % 5), rows.stop + 1, 5):
+            if row < self.height:
+                self.separators.append(self.canvas.create_line(left, row * size, right, row * size,
+                                                               fill=separator_color(row, self.height), width=2))
+        for col in range(max(5, cols.start - cols.start % 5), cols.stop + 1, 5):
+            if col < self.width:
+                self.separators.append(self.canvas.create_line(col * size, top, col * size, bottom,
+                                                               fill=separator_color(col, self.width), width=2))
+
+        self.refresh_clues(self.row_canvas, self.row_texts, self.row_clues, rows)
+        self.refresh_clues(self.col_canvas, self.col_texts, self.col_clues, cols)
+
+    def refresh_clues(self, canvas, texts, clues, visible):
+        for index in [index for index in texts if index not in visible]:
+            canvas.delete(texts.pop(index))
+        for index in visible:
+            if index not in texts:
+                texts[index] = self.draw_clues(canvas, clues[index])
+
+    def draw_clues(self, canvas, clues):
+        size = self.cell_size
+        if clues.kind == 'row':
+            x, y, anchor = int(canvas.cget('width')) - 4, clues.index * size + size // 2, tk.E
+        else:
+            x, y, anchor = clues.index * size + size // 2, int(canvas.cget('height')) - 4, tk.S
+        return canvas.create_text(x, y, text=clues.text(), anchor=anchor, justify=tk.RIGHT if clues.kind == 'row' else tk.CENTER,
+                                  font=self.clue_font(clues.state), fill=Clues.STATE_COLOR_MAP[clues.state])
+
+    def paint_clues(self, clues):
+        canvas, texts = (self.row_canvas, self.row_texts) if clues.kind == 'row' else (self.col_canvas, self.col_texts)
+        if clues.index in texts:
+            canvas.itemconfig(texts[clues.index], font=self.clue_font(clues.state), fill=Clues.STATE_COLOR_MAP[clues.state])
+            self.game.tk_calls += 1
+
+    def paint(self, row, col, state):
+        if (row, col) in self.cells:
+            self.canvas.itemconfig(self.cells[(row, col)], fill=state)
+            self.game.tk_calls += 1
+
+    def repaint(self):
+        for (row, col), item in self.cells.items():
+            self.canvas.itemconfig(item, fill=self.board.state(row, col))
+
+    def start(self):
+        self.active = True
+
+    def reset(self):
+        self.active = False
+        self.repaint()
+
+    def set_solved(self):
+        self.active = False
+        self.repaint()
+
+    def cell_at(self, x, y):
+        row = int(self.canvas.canvasy(y)) // self.cell_size
+        col = int(self.canvas.canvasx(x)) // self.cell_size
+        if self.active and 0 <= row < self.height and 0 <= col < self.width:
+            return row, col
+        return None
+
+    def click_filled(self, event):
+        cell = self.cell_at(event.x, event.y)
+        if cell is not None:
+            self.game.begin_stroke(*cell, Mark.FILLED)
+
+    def click_dynamic(self, event):
+        cell = self.cell_at(event.x, event.y)
+        if cell is not None:
+            self.game.begin_stroke(*cell, self.game.mark.state)
+
+    def drag(self, event):
+        self.game.extend_stroke(int(self.canvas.canvasy(event.y)) // self.cell_size, int(self.canvas.canvasx(event.x)) // self.cell_size)
+
+    def release(self, event):
+        self.game.end_stroke()
+
+
+def format_elapsed(seconds, fraction=False):
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    if fraction:
+        return f'{hours:02d}:{minutes:02d}:{seconds:09.6f}'
+    return f'{hours:02d}:{minutes:02d}:{int(seconds):02d}'
+
+
+class Stroke:
+    def __init__(self, row, col, target):
+        self.row = row
+        self.col = col
+        self.target = target
+        self.axis = None
+        self.last = (row, col)
+        self.rows = set()
+        self.cols = set()
 
 
 class Game:
     CELL_SIZE = 32
-
-    def __init__(self, gamedata):
+    FRAME_MS = 16
+    POLL_MS = 50
+
+    BUILD_CHUNK_MS = 20
+
+    def __init__(self, gamedata, renderer='frame', report_timings=False, journal=None, instruments=None, root=None, on_exit=None,
+                 stats=None):
+        self.created = perf_counter()
+        self.timings = {}
+        self.report_timings = report_timings
+        self.gamedata = gamedata
+        self.stats = stats
+        self.clicks = 0
+        self.renderer = renderer
         self.height = gamedata.height
         self.width = gamedata.width
         self.row_clues = gamedata.row_clues
         self.col_clues = gamedata.col_clues
+        self.board = Board(gamedata)
+        self.board.subscribe(self.cell_changed)
+        self.stroke = None
+        self.stroke_job = None
+        self.dirty_clues = set()
+        self.repaint_job = None
+        self.tk_calls = 0
+        self.hints = None
+        self.hints_used = 0
+        self.pending_checks = set()
+        self.mistake_line = None
+        self.poll_job = None
+        self.journal = journal
+        self.instruments = instruments
+        self.resume_events = journal.events if journal is not None else []
+        self.timer = None
+        self.build_job = None
+        self.on_exit = on_exit
         self.mark = Mark()
-        self.root = tk.Tk()
+        self.owns_root = root is None
+        self.root = tk.Tk() if root is None else root
         self.root.title('Pixel')
         self.root.protocol('WM_DELETE_WINDOW', self.clean_exit)
-        self.root.bind('<MouseWheel>', self.switch_mark)
-        self.root.iconify()
-
-        menubar = tk.Menu(self.root)
-        menubar.add_command(label='Reset', command=self.prompt_reset)
-        self.root.config(menu=menubar)
+        if self.owns_root:
+            self.window = self.root
+        else:
+            self.window = tk.Frame(self.root)
+            self.window.pack(fill=tk.BOTH, expand=True)
 
-        grid_height = Game.CELL_SIZE * self.height + 4
-        grid_width = Game.CELL_SIZE * self.width + 4
+        if self.renderer == 'viewport':
+            grid_height = grid_width = 0
+        else:
+            grid_height = Game.CELL_SIZE * self.height + 4
+            grid_width = Game.CELL_SIZE * self.width + 4
 
-        header_frame = tk.Frame(self.root, height=10)
+        header_frame = tk.Frame(self.window, height=10)
         header_frame.pack(side=tk.TOP, fill=tk.X, expand=True)
-        top_frame = tk.Frame(self.root, height=80)
+        top_frame = tk.Frame(self.window, height=80)
         top_frame.pack(side=tk.TOP, fill=tk.X, expand=True)
-        top_buffer = tk.Frame(self.root, height=10)
+        top_buffer = tk.Frame(self.window, height=10)
         top_buffer.pack(side=tk.TOP, fill=tk.X, expand=True)
 
         self.clock_text = tk.StringVar()
@@ -347,66 +708,101 @@ class Game:
         time_label.pack(side=tk.TOP, fill=tk.X)
         clock_label = tk.Label(top_frame, textvariable=self.clock_text, font=('Helvetica', 12, 'bold'))
         clock_label.pack(side=tk.TOP, fill=tk.X)
+        self.status_text = tk.StringVar()
+        status_label = tk.Label(top_frame, textvariable=self.status_text, font=('Helvetica', 10))
+        status_label.pack(side=tk.TOP, fill=tk.X)
         
-        game_frame = tk.Frame(self.root, highlightbackground='black', highlightthickness=1)
+        game_frame = tk.Frame(self.window, highlightbackground='black', highlightthickness=1)
         game_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=50)
         game_frame.columnconfigure(0, weight=1)
         game_frame.rowconfigure(1, minsize=grid_height, weight=0)
         game_frame.rowconfigure(0, weight=1)
         game_frame.rowconfigure(1, minsize=grid_width, weight=0)
 
-        bottom_buffer = tk.Frame(self.root, height=25)
+        bottom_buffer = tk.Frame(self.window, height=25)
         bottom_buffer.pack(side=tk.TOP, fill=tk.X, expand=True)
-        bottom_frame = tk.Frame(self.root, height=100)
+        bottom_frame = tk.Frame(self.window, height=100)
         bottom_frame.pack(side=tk.TOP, fill=tk.X, expand=True)
-        footer_frame = tk.Frame(self.root, height=25)
+        footer_frame = tk.Frame(self.window, height=25)
         footer_frame.pack(side=tk.TOP, fill=tk.X, expand=True)
 
-        row_clues_outer_frame = tk.Frame(game_frame)
-        row_clues_outer_frame.grid(row=1, column=0, sticky=tk.NSEW)
-        row_clues_container = tk.Frame(row_clues_outer_frame)
-        row_clues_container.pack(padx=2, pady=2, fill=tk.BOTH, expand=False)
-        for row in range(self.height):
-            row_clues_container.rowconfigure(row, minsize=32, weight=0)
-        self.row_clues_frames = {}
-        self.row_clues_labels = {}
-        for row, row_clue in enumerate(self.row_clues):
-            self.row_clues_frames[row] = RowClues(self, self.root, row_clues_container, row, row_clue)
-            self.row_clues_frames[row].grid(row=row, column=0, sticky=tk.NSEW)
-
-        col_clues_outer_frame = tk.Frame(game_frame)
-        col_clues_outer_frame.grid(row=0, column=1, sticky=tk.NSEW)
-        col_clues_container = tk.Frame(col_clues_outer_frame)
-        col_clues_container.pack(padx=2, pady=2, fill=tk.BOTH, expand=False)
-        for col in range(self.width):
-            col_clues_container.columnconfigure(col, minsize=32, weight=0)
-        self.col_clues_frames = {}
-        self.col_clues_labels = {}
-        for col, col_clue in enumerate(self.col_clues):
-            self.col_clues_frames[col] = ColClues(self, self.root, col_clues_container, col, col_clue)
-            self.col_clues_frames[col].grid(row=0, column=col, sticky=tk.NSEW)
-
-        grid_outer_frame = tk.Frame(game_frame, background='black')
-        grid_outer_frame.grid(row=1, column=1, sticky=tk.NSEW)
-        self.grid_frame = tk.Frame(grid_outer_frame)
-        self.grid_frame.pack(padx=2, pady=2, fill=tk.BOTH, expand=True)
-        for row in range(self.height):
-            self.grid_frame.rowconfigure(row, minsize=32, weight=0)
-        for col in range(self.width):
-            self.grid_frame.columnconfigure(col, minsize=32, weight=0)
+        self.game_frame = game_frame
+        self.bottom_frame = bottom_frame
+        self.progress = ttk.Progressbar(self.window, mode='determinate', maximum=2 * self.height + self.width + 1)
+        self.progress.pack(side=tk.TOP, fill=tk.X, padx=50, pady=5)
+        self.root.update()
+        self.timings['first_window'] = perf_counter() - self.created
+
+        self.build_steps = self.build()
+        self.build_job = self.root.after(0, self.build_chunk)
+        if self.owns_root:
+            self.root.mainloop()
+
+    def build_chunk(self):
+        deadline = perf_counter() + Game.BUILD_CHUNK_MS / 1000
+        for _ in self.build_steps:
+            self.progress.step()
+            if perf_counter() >= deadline:
+                self.build_job = self.root.after(1, self.build_chunk)
+                return
+        self.build_job = None
+        self.progress.destroy()
+        self.timings['interactive'] = perf_counter() - self.created
+        if self.report_timings:
+            print(f'first window: {self.timings["first_window"] * 1000:.0f} ms, '
+                  f'interactive: {self.timings["interactive"] * 1000:.0f} ms', file=sys.stderr)
+        self.prompt_start()
 
-        self.grid = {}
+    def build(self):
+        game_frame = self.game_frame
+        bottom_frame = self.bottom_frame
 
-        for row in range(self.height):
-            self.grid[row] = {}
+        if self.renderer == 'viewport':
+            self.grid_frame = ViewportGrid(self, self.root, game_frame, self.board)
+            self.grid_frame.grid(row=0, column=0, rowspan=2, columnspan=2, sticky=tk.NSEW)
+            self.row_clues_frames = self.grid_frame.row_clues
+            self.col_clues_frames = self.grid_frame.col_clues
+            yield from self.grid_frame.build()
+        else:
+            row_clues_outer_frame = tk.Frame(game_frame)
+            row_clues_outer_frame.grid(row=1, column=0, sticky=tk.NSEW)
+            row_clues_container = tk.Frame(row_clues_outer_frame)
+            row_clues_container.pack(padx=2, pady=2, fill=tk.BOTH, expand=False)
+            for row in range(self.height):
+                row_clues_container.rowconfigure(row, minsize=32, weight=0)
+            self.row_clues_frames = {}
+            for row, row_clue in enumerate(self.row_clues):
+                self.row_clues_frames[row] = RowClues(self, self.root, row_clues_container, row, row_clue)
+                self.row_clues_frames[row].grid(row=row, column=0, sticky=tk.NSEW)
+                yield
+
+            col_clues_outer_frame = tk.Frame(game_frame)
+            col_clues_outer_frame.grid(row=0, column=1, sticky=tk.NSEW)
+            col_clues_container = tk.Frame(col_clues_outer_frame)
+            col_clues_container.pack(padx=2, pady=2, fill=tk.BOTH, expand=False)
             for col in range(self.width):
-                self.grid[row][col] = Cell(self, self.root, self.grid_frame, row, col, self.height, self.width)
-                self.grid[row][col].grid(row=row, column=col, sticky=tk.NSEW)
-
-        self.root.update()
-        row_clues_container.columnconfigure(0, minsize=row_clues_container.winfo_reqwidth(), weight=0)
-        col_clues_container.rowconfigure(0, minsize=col_clues_container.winfo_reqheight(), weight=0)
-        bottom_frame_width = self.root.winfo_reqwidth() - 10
+                col_clues_container.columnconfigure(col, minsize=32, weight=0)
+            self.col_clues_frames = {}
+            for col, col_clue in enumerate(self.col_clues):
+                self.col_clues_frames[col] = ColClues(self, self.root, col_clues_container, col, col_clue)
+                self.col_clues_frames[col].grid(row=0, column=col, sticky=tk.NSEW)
+                yield
+
+            grid_outer_frame = tk.Frame(game_frame, background='black')
+            grid_outer_frame.grid(row=1, column=1, sticky=tk.NSEW)
+            if self.renderer == 'canvas':
+                self.grid_frame = CellCanvas(self, self.root, grid_outer_frame, self.height, self.width)
+                self.grid_frame.pack(padx=2, pady=2)
+            else:
+                self.grid_frame = CellFrame(self, self.root, grid_outer_frame, self.height, self.width)
+                self.grid_frame.pack(padx=2, pady=2, fill=tk.BOTH, expand=True)
+            yield from self.grid_frame.build()
+
+        self.root.update_idletasks()
+        if self.renderer != 'viewport':
+            row_clues_container.columnconfigure(0, minsize=row_clues_container.winfo_reqwidth(), weight=0)
+            col_clues_container.rowconfigure(0, minsize=col_clues_container.winfo_reqheight(), weight=0)
+        bottom_frame_width = self.window.winfo_reqwidth() - 10
         split_bottom_width = bottom_frame_width // 2
         bottom_frame.columnconfigure(0, minsize=5, weight=0)
         bottom_frame.columnconfigure(1, minsize=bottom_frame_width, weight=0)
@@ -453,64 +849,159 @@ class Game:
         right_click_mark_label = tk.Label(right_click_frame_right, textvariable=self.right_click_mark, font=('Helvetica', 8))
         right_click_mark_label.pack(side=tk.TOP)
 
-        self.prompt_start()
-        self.root.mainloop()
+        self.hints = HintEngine(self.board)
+        self.show_mistakes = tk.BooleanVar(value=False)
+        menubar = tk.Menu(self.root)
+        menubar.add_command(label='Reset', command=self.prompt_reset)
+        menubar.add_command(label='Hint', command=self.request_hint)
+        menubar.add_checkbutton(label='Show Mistakes', variable=self.show_mistakes, command=self.toggle_mistakes)
+        if self.renderer == 'viewport':
+            menubar.add_command(label='Zoom In', command=self.zoom_in)
+            menubar.add_command(label='Zoom Out', command=self.zoom_out)
+        if self.instruments is not None:
+            menubar.add_command(label='Timings', command=self.show_instruments)
+        self.root.config(menu=menubar)
+        self.root.bind('<MouseWheel>', self.switch_mark)
 
     def update(self):
+        self.board.rescan()
         for row in range(self.height):
-            cells = [(self.grid[row][col].value(), self.width - (col + 1)) for col in range(self.width)]
-            not_empty = reduce(lambda a, b: (a[0] + b[0], 0), cells)[0]
-            value = reduce(lambda a, b: ((a[0] << a[1]) + (b[0] << b[1]), 0), cells)[0]
-            clue = self.row_clues[row]
-            if not_empty == sum(clue) and value in self.possibles(clue, self.width):
-                self.set_solved(row=row)
-            else:
-                self.set_normal(row=row)
-
+            self.update_line(row=row)
         for col in range(self.width):
-            cells = [(self.grid[row][col].value(), self.height - (row + 1)) for row in range(self.height)]
-            not_empty = reduce(lambda a, b: (a[0] + b[0], 0), cells)[0]
-            value = reduce(lambda a, b: ((a[0] << a[1]) + (b[0] << b[1]), 0), cells)[0]
-            clue = self.col_clues[col]
-            if not_empty == sum(clue) and value in self.possibles(clue, self.height):
-                self.set_solved(col=col)
-            else:
-                self.set_normal(col=col)
+            self.update_line(col=col)
+        self.check_solved()
 
+    def cell_changed(self, row, col):
+        self.grid_frame.paint(row, col, self.board.state(row, col))
+        if self.stroke is not None:
+            self.stroke.rows.add(row)
+            self.stroke.cols.add(col)
+            return
+        self.update_line(row=row)
+        self.update_line(col=col)
+        self.board_changed()
         self.check_solved()
 
-    def possibles(self, clues, length):
-        def blank_distributions(blanks, range_start=1):
-            yield (blanks,)
-            for i in range(range_start, blanks // 2 + 1):
-                for p in blank_distributions(blanks - i, i):
-                    yield (i,) + p
-
-        def floating_distributions(floating_blanks, possible_blank_locations):
-            distributions = [distribution + (0,) * (possible_blank_locations - len(distribution))
-                             for distribution
-                             in blank_distributions(floating_blanks)
-                             if len(distribution) <= possible_blank_locations]
-            return reduce(lambda a, b: a + b, map(lambda d: list(set(permutations(d))), distributions))
-
-        total_blanks = length - sum(clues)
-        possible_blank_locations = len(clues) + 1
-        mandatory_blank_locations = len(clues) - 1
-        floating_blanks = total_blanks - mandatory_blank_locations
-        mandatory_blanks = (0,) + (1,) * mandatory_blank_locations + (0,)
-
-        _clues = clues[::-1]
-        possibles = []
-        for possible_floating_blanks in floating_distributions(floating_blanks, possible_blank_locations):
-            blanks = list(map(lambda x, y: x + y, mandatory_blanks, possible_floating_blanks))[-1:0:-1]
-            offset = 0
-            possible = 0
-            for enum, blank in enumerate(blanks):
-                offset += blank
-                possible += int('1' * _clues[enum], 2) << offset
-                offset += _clues[enum]
-            possibles.append(possible)
-        return possibles
+    def begin_stroke(self, row, col, mark):
+        if self.stroke is not None:
+            self.end_stroke()
+        self.stroke = Stroke(row, col, Mark.MARK_STATE_CHANGE_MAP[mark][self.board.state(row, col)])
+        self.clicks += 1
+        self.record(MARK, row, col, mark)
+        self.board.set_state(row, col, self.stroke.target, validate=False)
+        self.schedule_stroke_validation()
+
+    def extend_stroke(self, row, col):
+        stroke = self.stroke
+        if stroke is None:
+            return
+        row = min(max(row, 0), self.height - 1)
+        col = min(max(col, 0), self.width - 1)
+        if stroke.axis is None:
+            if (row, col) == (stroke.row, stroke.col):
+                return
+            stroke.axis = 'row' if abs(col - stroke.col) >= abs(row - stroke.row) else 'col'
+        if stroke.axis == 'row':
+            last, step = stroke.last[1], 1 if col >= stroke.last[1] else -1
+            cells = [(stroke.row, index) for index in range(last + step, col + step, step)]
+        else:
+            last, step = stroke.last[0], 1 if row >= stroke.last[0] else -1
+            cells = [(index, stroke.col) for index in range(last + step, row + step, step)]
+        for cell in cells:
+            self.record(PAINT, *cell, stroke.target)
+            self.board.set_state(*cell, stroke.target, validate=False)
+        if cells:
+            stroke.last = cells[-1]
+            self.schedule_stroke_validation()
+
+    def end_stroke(self):
+        if self.stroke is None:
+            return
+        if self.stroke_job is not None:
+            self.root.after_cancel(self.stroke_job)
+        self.validate_stroke()
+        self.stroke = None
+
+    def schedule_stroke_validation(self):
+        if self.stroke_job is None:
+            self.stroke_job = self.root.after(Game.FRAME_MS, self.validate_stroke)
+
+    def validate_stroke(self):
+        self.stroke_job = None
+        stroke = self.stroke
+        if stroke is None:
+            return
+        rows, cols = stroke.rows, stroke.cols
+        stroke.rows, stroke.cols = set(), set()
+        self.board.validate(rows, cols)
+        for row in rows:
+            self.update_line(row=row)
+        for col in cols:
+            self.update_line(col=col)
+        self.board_changed()
+        self.check_solved()
+
+    def board_changed(self):
+        if self.show_mistakes.get():
+            self.pending_checks.add('mistake')
+        for kind in self.pending_checks:
+            self.hints.submit(kind, self.board.version, self.board.cells)
+
+    def request_hint(self, event=None):
+        self.hints_used += 1
+        self.status_text.set('Looking for a hint...')
+        self.pending_checks.add('hint')
+        self.hints.submit('hint', self.board.version, self.board.cells)
+
+    def toggle_mistakes(self, event=None):
+        if self.show_mistakes.get():
+            self.board_changed()
+        else:
+            self.pending_checks.discard('mistake')
+            self.show_mistake(False)
+
+    def poll_checks(self):
+        for kind, version, result in self.hints.poll():
+            if kind not in self.pending_checks or version != self.board.version:
+                continue
+            self.pending_checks.discard(kind)
+            if kind == 'hint':
+                self.show_hint(result)
+            else:
+                self.show_mistake(result)
+        self.poll_job = self.root.after(Game.POLL_MS, self.poll_checks)
+
+    def show_hint(self, result):
+        if 'contradiction' in result:
+            kind, index = result['contradiction']
+            self.status_text.set(f'{"Row" if kind == "row" else "Column"} {index + 1} can no longer match its clue')
+        elif result:
+            state = 'filled' if result['filled'] else 'blank'
+            self.status_text.set(f'Hint: row {result["row"] + 1}, column {result["col"] + 1} is {state}')
+        else:
+            self.status_text.set('No hint available')
+
+    def show_mistake(self, result):
+        if self.mistake_line is not None:
+            kind, index = self.mistake_line
+            self.mistake_line = None
+            self.update_line(**{kind: index})
+        if result:
+            kind, index = self.mistake_line = result
+            if kind == 'row':
+                self.row_clues_frames[index].set_error()
+            else:
+                self.col_clues_frames[index].set_error()
+
+    def update_line(self, row=None, col=None):
+        if row is not None:
+            solved = self.board.row_solved[row]
+        else:
+            solved = self.board.col_solved[col]
+        if solved:
+            self.set_solved(row=row, col=col)
+        else:
+            self.set_normal(row=row, col=col)
 
     def set_normal(self, row=None, col=None):
         if row is not None:
@@ -524,30 +1015,74 @@ class Game:
         elif col is not None:
             self.col_clues_frames[col].set_solved()
 
+    def schedule_repaint(self, clues):
+        self.dirty_clues.add(clues)
+        if self.repaint_job is None:
+            self.repaint_job = self.root.after_idle(self.flush_repaint)
+            self.tk_calls += 1
+
+    def flush_repaint(self):
+        self.repaint_job = None
+        dirty_clues, self.dirty_clues = self.dirty_clues, set()
+        for clues in dirty_clues:
+            clues.update_labels()
+
     def check_solved(self):
-        if all(self.row_clues_frames[row].is_solved() for row in range(self.height)) and all(self.col_clues_frames[col].is_solved() for col in range(self.width)):
+        if self.board.is_solved():
             self.complete()
 
     def complete(self):
-        self.root.after_cancel(self.timer)
-        elapsed = datetime.utcfromtimestamp((datetime.now() - self.start_time).total_seconds())
-        self.clock_text.set(elapsed.strftime('%H:%M:%S.%f'))
-        for row in range(self.height):
-            for col in range(self.width):
-                self.grid[row][col].set_solved()
-        if messagebox.showinfo('Complete!', f'Congratulations!\n\nTime taken: {elapsed.strftime("%H:%M:%S.%f")}'):
+        self.stroke = None
+        if self.stroke_job is not None:
+            self.root.after_cancel(self.stroke_job)
+            self.stroke_job = None
+        if self.timer is not None:
+            self.root.after_cancel(self.timer)
+            self.timer = None
+        elapsed = monotonic() - self.start_time
+        self.clock_text.set(format_elapsed(elapsed, fraction=True))
+        message = f'Congratulations!\n\nTime taken: {format_elapsed(elapsed, fraction=True)}'
+        if self.stats is not None:
+            best = self.stats.best_time(self.gamedata)
+            if best is not None:
+                message += f'\nPersonal best: {format_elapsed(min(best, elapsed), fraction=True)}'
+            self.stats.record(self.gamedata, elapsed, self.clicks, self.hints_used)
+        if self.repaint_job is not None:
+            self.root.after_cancel(self.repaint_job)
+            self.flush_repaint()
+        if self.poll_job is not None:
+            self.root.after_cancel(self.poll_job)
+            self.poll_job = None
+        self.board.set_solved()
+        self.grid_frame.set_solved()
+        if messagebox.showinfo('Complete!', message):
             pass
         self.clean_exit()
 
 
+    def record(self, event, row=0, col=0, state=Mark.EMPTY):
+        if self.journal is not None:
+            self.journal.record(event, row, col, state)
+
     def switch_mark(self, event=None):
         self.mark.switch_state()
+        self.record(SWITCH, state=self.mark.state)
         self.right_click_mark_frame.config(background=self.mark.state)
         self.right_click_mark.set(self.mark.get_state_text())
 
+    def show_instruments(self, event=None):
+        report = self.instruments.report()
+        print(report, file=sys.stderr)
+        messagebox.showinfo('Timings', report)
+
+    def zoom_in(self, event=None):
+        return self.grid_frame.zoom_in()
+
+    def zoom_out(self, event=None):
+        return self.grid_frame.zoom_out()
+
     def tick(self, event=None):
-        elapsed = datetime.utcfromtimestamp((datetime.now() - self.start_time).total_seconds())
-        self.clock_text.set(elapsed.strftime('%H:%M:%S'))
+        self.clock_text.set(format_elapsed(monotonic() - self.start_time))
         self.timer = self.root.after(1000, self.tick)
 
     def prompt_start(self, event=None):
@@ -558,30 +1093,119 @@ class Game:
             self.clean_exit()
 
     def start(self):
+        self.grid_frame.start()
+        self.start_time = monotonic()
+        self.clicks = 0
+        if self.resume_events:
+            self.resume()
+            self.start_time -= self.journal.elapsed()
+        else:
+            self.record(START)
+        self.timer = self.root.after(1000, self.tick)
+        if self.poll_job is None:
+            self.poll_job = self.root.after(Game.POLL_MS, self.poll_checks)
+        self.update()
+
+    def resume(self):
+        events, self.resume_events = self.resume_events, []
+        for _, event, _, _, _ in events:
+            self.clicks = 0 if event in (START, RESET) else self.clicks + (event == MARK)
+        self.board.unsubscribe(self.cell_changed)
+        replay(self.board, self.mark, events)
+        self.board.subscribe(self.cell_changed)
         for row in range(self.height):
             for col in range(self.width):
-                self.grid[row][col].start()
-        self.update()
-        self.start_time = datetime.now()
-        self.timer = self.root.after(1000, self.tick)
+                self.grid_frame.paint(row, col, self.board.state(row, col))
+        self.right_click_mark_frame.config(background=self.mark.state)
+        self.right_click_mark.set(self.mark.get_state_text())
 
     def prompt_reset(self, event=None):
         if messagebox.askyesno('Restart?', 'Do you wish to restart?'):
             self.reset()
 
     def reset(self):
-        self.root.after_cancel(self.timer)
-        for row in range(self.height):
-            for col in range(self.width):
-                self.grid[row][col].reset()
+        if self.timer is not None:
+            self.root.after_cancel(self.timer)
+            self.timer = None
+        self.record(RESET)
+        self.board.reset()
+        self.grid_frame.reset()
         self.clock_text.set('00:00:00')
         self.start()
 
     def clean_exit(self, event=None):
-        self.root.destroy()
+        if self.hints is not None:
+            self.hints.stop()
+        if self.journal is not None:
+            self.journal.close()
+        if self.instruments is not None:
+            self.instruments.dump()
+            self.instruments = None
+        if self.owns_root:
+            self.root.destroy()
+            return
+        for job in (self.build_job, self.timer, self.stroke_job, self.repaint_job, self.poll_job):
+            if job is not None:
+                self.root.after_cancel(job)
+        self.root.config(menu='')
+        self.root.unbind('<MouseWheel>')
+        self.window.destroy()
+        if self.on_exit is not None:
+            self.on_exit()
+
+
+INSTRUMENTED_METHODS = (
+    (Game, 'begin_stroke', 'press'),
+    (Game, 'extend_stroke', 'drag'),
+    (Game, 'validate_stroke', 'validate'),
+    (Game, 'cell_changed', 'cell changed'),
+    (Game, 'update', 'update'),
+    (Board, 'set_state', 'set state'),
+    (Board, 'update_line', 'update line'),
+    (puzzle, 'line_matches', 'line matches'),
+    (Game, 'flush_repaint', 'repaint'),
+    (Clues, 'update_labels', 'clue repaint'),
+    (CanvasClues, 'update_labels', 'clue repaint'))
 
 
 if __name__ == '__main__':
-    Game(GameData.Kiwi)
-    # Game(GameData.Monk)
-    # Game(GameData.Candle)
+    parser = argparse.ArgumentParser(description='Play a picross puzzle.')
+    parser.add_argument('--pack', help='puzzle pack to load the puzzle from')
+    parser.add_argument('--puzzle', help='GameData puzzle name, or id/name of a --pack entry (default: choose from a list)')
+    parser.add_argument('--renderer', choices=('frame', 'canvas', 'viewport'), default='frame')
+    parser.add_argument('--timings', action='store_true', help='report time to first window and time to interactive')
+    parser.add_argument('--journal', help='record every move to this journal file')
+    parser.add_argument('--resume', help='continue the game recorded in this journal file')
+    parser.add_argument('--instrument', action='store_true', help='time the hot paths and report latency percentiles on exit')
+    parser.add_argument('--profile', help='also write a cProfile stats file to this path')
+    parser.add_argument('--stats', default=STATS_PATH, help='completion stats database')
+    args = parser.parse_args()
+    if args.journal and args.puzzle is None and not args.resume:
+        parser.error('--journal records a single game; choose one with --puzzle')
+    stats = StatsStore(args.stats)
+    instruments = Instruments.from_environment(args.instrument, args.profile)
+    if instruments is not None:
+        instruments.install(INSTRUMENTED_METHODS)
+
+    def launch(gamedata, root=None, on_exit=None, journal=None):
+        if journal is None and args.journal:
+            journal = Journal(args.journal, gamedata)
+        return Game(gamedata, renderer=args.renderer, report_timings=args.timings, journal=journal, instruments=instruments,
+                    root=root, on_exit=on_exit, stats=stats)
+
+    pack = None
+    if args.pack:
+        from pack import Pack
+        pack = Pack(args.pack)
+    if args.resume:
+        journal = Journal(args.resume)
+        launch(journal.puzzle, journal=journal)
+    elif args.puzzle is None:
+        from browser import browse
+        from pack import gamedata_puzzles
+        browse(pack if pack is not None else gamedata_puzzles(), launch, stats.best)
+    elif pack is not None:
+        launch(pack.load(args.puzzle))
+    else:
+        launch(getattr(GameData, args.puzzle))
+    stats.close()
@@ -0,0 +1,370 @@
+import hashlib
+import json
+import os
+from functools import lru_cache, reduce
+from itertools import combinations, groupby, permutations
+from math import comb
+
+
+class GameData:
+    class Kiwi:
+        height = 15
+        width = 15
+        row_clues = [(1, 1),
+                     (1, 1),
+                     (2, 1, 1, 2),
+                     (3, 3),
+                     (4, 3, 1),
+                     (2, 1, 4),
+                     (4, 1, 2),
+                     (5, 1, 1),
+                     (8,),
+                     (1, 6),
+                     (1, 3),
+                     (3, 2),
+                     (2, 1),
+                     (3, 1),
+                     (2, 1, 1, 1)]
+        col_clues = [(1,),
+                     (1,),
+                     (1,),
+                     (1, 1),
+                     (1, 3),
+                     (2,),
+                     (1, 4),
+                     (1, 4, 1),
+                     (4, 1, 1),
+                     (1, 4, 1, 1),
+                     (2, 2, 3, 4),
+                     (5, 2, 3),
+                     (3, 4, 1),
+                     (1, 2, 6),
+                     (1, 6, 1)]
+
+    class Monk:
+        height = 10
+        width = 10
+        row_clues = [(7,),
+                     (3, 1, 1),
+                     (2, 1, 1, 1),
+                     (1, 1, 3),
+                     (1, 4, 1),
+                     (3, 2),
+                     (3, 3),
+                     (6, 1),
+                     (2, 2),
+                     (5, 2, 1)]
+        col_clues = [(1, 2, 1),
+                     (8, 1),
+                     (3, 5),
+                     (1, 1, 3),
+                     (1, 1, 1, 1, 1),
+                     (2, 2, 1),
+                     (1, 1, 1, 1, 1),
+                     (1, 1, 2, 2),
+                     (8,),
+                     (1, 1, 1)]
+
+    class Candle:
+        height = 5
+        width = 5
+        row_clues = [(1, 1),
+                     (1, 1, 1),
+                     (5,),
+                     (1,),
+                     (3,)]
+        col_clues = [(3,),
+                     (1, 1),
+                     (5,),
+                     (1, 1),
+                     (2,)]
+
+
+def line_clue(cells):
+    return tuple(len(list(run)) for filled, run in groupby(cells) if filled) or (0,)
+
+
+def puzzle_key(gamedata):
+    clues = repr((gamedata.height, gamedata.width,
+                  [tuple(clue) for clue in gamedata.row_clues], [tuple(clue) for clue in gamedata.col_clues]))
+    return hashlib.sha1(clues.encode()).hexdigest()
+
+
+class Puzzle:
+    def __init__(self, name, height, width, row_clues, col_clues):
+        self.name = name
+        self.height = height
+        self.width = width
+        self.row_clues = [tuple(clue) for clue in row_clues]
+        self.col_clues = [tuple(clue) for clue in col_clues]
+
+    @classmethod
+    def from_gamedata(cls, gamedata):
+        return cls(gamedata.name if hasattr(gamedata, 'name') else gamedata.__name__, gamedata.height, gamedata.width,
+                   gamedata.row_clues, gamedata.col_clues)
+
+    @classmethod
+    def from_bits(cls, name, bits):
+        rows = [tuple(map(bool, row)) for row in bits]
+        return cls(name, len(rows), len(rows[0]) if rows else 0,
+                   [line_clue(row) for row in rows], [line_clue(col) for col in zip(*rows)])
+
+    @classmethod
+    def from_dict(cls, data, name=None):
+        return cls(data.get('name', name), data['height'], data['width'], data['row_clues'], data['col_clues'])
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'height': self.height,
+            'width': self.width,
+            'row_clues': [list(clue) for clue in self.row_clues],
+            'col_clues': [list(clue) for clue in self.col_clues]}
+
+
+def load_puzzles(path, invalid=None):
+    if os.path.isdir(path):
+        for filename in sorted(os.listdir(path)):
+            if filename.endswith('.json'):
+                yield from load_puzzles(os.path.join(path, filename), invalid)
+        return
+    name = os.path.splitext(os.path.basename(path))[0]
+    try:
+        with open(path) as puzzle_file:
+            data = json.load(puzzle_file)
+    except ValueError as error:
+        if invalid is None:
+            raise
+        yield invalid(name, error)
+        return
+    entries = [(f'{name}-{enum}', entry) for enum, entry in enumerate(data)] if isinstance(data, list) else [(name, data)]
+    for entry_name, entry in entries:
+        try:
+            puzzle = Puzzle.from_dict(entry, name=entry_name)
+        except (AttributeError, KeyError, TypeError, ValueError) as error:
+            if invalid is None:
+                raise
+            puzzle = invalid(entry_name, error)
+        yield puzzle
+
+
+LINE_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=LINE_CACHE_SIZE)
+def line_matches(clue, length, value):
+    if value >> length:
+        return False
+    return tuple(len(run) for run in bin(value)[2:].split('0') if run) == tuple(run for run in clue if run)
+
+
+def legacy_possibles(clues, length):
+    def blank_distributions(blanks, range_start=1):
+        yield (blanks,)
+        for i in range(range_start, blanks // 2 + 1):
+            for p in blank_distributions(blanks - i, i):
+                yield (i,) + p
+
+    def floating_distributions(floating_blanks, possible_blank_locations):
+        distributions = [distribution + (0,) * (possible_blank_locations - len(distribution))
+                         for distribution
+                         in blank_distributions(floating_blanks)
+                         if len(distribution) <= possible_blank_locations]
+        return reduce(lambda a, b: a + b, map(lambda d: list(set(permutations(d))), distributions))
+
+    total_blanks = length - sum(clues)
+    possible_blank_locations = len(clues) + 1
+    mandatory_blank_locations = len(clues) - 1
+    floating_blanks = total_blanks - mandatory_blank_locations
+    mandatory_blanks = (0,) + (1,) * mandatory_blank_locations + (0,)
+
+    _clues = clues[::-1]
+    possibles = []
+    for possible_floating_blanks in floating_distributions(floating_blanks, possible_blank_locations):
+        blanks = list(map(lambda x, y: x + y, mandatory_blanks, possible_floating_blanks))[-1:0:-1]
+        offset = 0
+        possible = 0
+        for enum, blank in enumerate(blanks):
+            offset += blank
+            possible += int('1' * _clues[enum], 2) << offset
+            offset += _clues[enum]
+        possibles.append(possible)
+    return possibles
+
+
+def placements(clue, length):
+    runs = tuple(run for run in clue if run)
+    shifts = [length - sum(runs[:enum + 1]) for enum in range(len(runs))]
+    masks = [(1 << run) - 1 for run in runs]
+    for gaps in combinations(range(length - sum(runs) + 1), len(runs)):
+        possible = 0
+        for gap, shift, mask in zip(gaps, shifts, masks):
+            possible |= mask << (shift - gap)
+        yield possible
+
+
+def count_placements(clue, length):
+    runs = tuple(run for run in clue if run)
+    slots = length - sum(runs) + 1
+    return comb(slots, len(runs)) if slots >= 0 else 0
+
+
+class Mark:
+    EMPTY = 'white'
+    FILLED = 'black'
+    POSSIBLE = 'gray70'
+    BLANK = 'IndianRed1'
+
+    SWITCH_MAP = {
+        POSSIBLE: BLANK,
+        BLANK: POSSIBLE}
+
+    MARK_STATE_CHANGE_MAP = {
+        FILLED: {
+            EMPTY: FILLED,
+            FILLED: EMPTY,
+            POSSIBLE: FILLED,
+            BLANK: EMPTY},
+        POSSIBLE: {
+            EMPTY: POSSIBLE,
+            FILLED: FILLED,
+            POSSIBLE: EMPTY,
+            BLANK: BLANK},
+        BLANK: {
+            EMPTY: BLANK,
+            FILLED: EMPTY,
+            POSSIBLE: BLANK,
+            BLANK: EMPTY}}
+
+    MARK_TEXT_MAP = {
+        FILLED: 'Mark Cell',
+        POSSIBLE: 'Mark Possible',
+        BLANK: 'Mark Blank'}
+
+    STATE_VALUE_MAP = {
+        EMPTY: 0,
+        FILLED: 1,
+        POSSIBLE: 0,
+        BLANK: 0}
+
+    STATE_SOLVED_MAP = {
+        EMPTY: EMPTY,
+        FILLED: FILLED,
+        POSSIBLE: EMPTY,
+        BLANK: EMPTY}
+
+    def __init__(self):
+        self.state = Mark.POSSIBLE
+
+    def switch_state(self):
+        self.state = Mark.SWITCH_MAP[self.state]
+
+    def get_mark_text(self):
+        return Mark.MARK_TEXT_MAP[Mark.FILLED]
+
+    def get_state_text(self):
+        return Mark.MARK_TEXT_MAP[self.state]
+
+
+class Board:
+    STATES = (Mark.EMPTY, Mark.FILLED, Mark.POSSIBLE, Mark.BLANK)
+    STATE_CODES = {state: code for code, state in enumerate(STATES)}
+
+    def __init__(self, gamedata):
+        self.height = gamedata.height
+        self.width = gamedata.width
+        self.row_clues = tuple(tuple(clue) for clue in gamedata.row_clues)
+        self.col_clues = tuple(tuple(clue) for clue in gamedata.col_clues)
+        self.cells = bytearray(self.height * self.width)
+        self.rows = [0] * self.height
+        self.cols = [0] * self.width
+        self.row_solved = [False] * self.height
+        self.col_solved = [False] * self.width
+        self.solved_lines = 0
+        self.version = 0
+        self.listeners = []
+        self.rescan()
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self.listeners.remove(listener)
+
+    def state(self, row, col):
+        return Board.STATES[self.cells[row * self.width + col]]
+
+    def mark(self, row, col, mark):
+        state = Mark.MARK_STATE_CHANGE_MAP[mark][self.state(row, col)]
+        self.set_state(row, col, state)
+        return state
+
+    def set_state(self, row, col, state, validate=True):
+        self.version += 1
+        self.cells[row * self.width + col] = Board.STATE_CODES[state]
+        row_bit = 1 << (self.width - (col + 1))
+        col_bit = 1 << (self.height - (row + 1))
+        if Mark.STATE_VALUE_MAP[state]:
+            self.rows[row] |= row_bit
+            self.cols[col] |= col_bit
+        else:
+            self.rows[row] &= ~row_bit
+            self.cols[col] &= ~col_bit
+        if validate:
+            self.update_line(row=row)
+            self.update_line(col=col)
+        for listener in self.listeners:
+            listener(row, col)
+
+    def update_line(self, row=None, col=None):
+        solved = self.check_line(row=row, col=col)
+        if row is not None:
+            self.solved_lines += solved - self.row_solved[row]
+            self.row_solved[row] = solved
+        else:
+            self.solved_lines += solved - self.col_solved[col]
+            self.col_solved[col] = solved
+        return solved
+
+    def validate(self, rows=(), cols=()):
+        for row in rows:
+            self.update_line(row=row)
+        for col in cols:
+            self.update_line(col=col)
+
+    def check_line(self, row=None, col=None):
+        if row is not None:
+            return line_matches(self.row_clues[row], self.width, self.rows[row])
+        return line_matches(self.col_clues[col], self.height, self.cols[col])
+
+    def rescan(self):
+        self.row_solved = [False] * self.height
+        self.col_solved = [False] * self.width
+        self.solved_lines = 0
+        for row in range(self.height):
+            self.update_line(row=row)
+        for col in range(self.width):
+            self.update_line(col=col)
+
+    def audit(self):
+        mismatches = [('row', row) for row in range(self.height) if self.check_line(row=row) != self.row_solved[row]]
+        mismatches += [('col', col) for col in range(self.width) if self.check_line(col=col) != self.col_solved[col]]
+        if self.solved_lines != sum(self.row_solved) + sum(self.col_solved):
+            mismatches.append(('count', self.solved_lines))
+        return mismatches
+
+    def is_solved(self):
+        return self.solved_lines == self.height + self.width
+
+    def set_solved(self):
+        self.version += 1
+        for index, code in enumerate(self.cells):
+            self.cells[index] = Board.STATE_CODES[Mark.STATE_SOLVED_MAP[Board.STATES[code]]]
+
+    def reset(self):
+        self.version += 1
+        self.cells = bytearray(self.height * self.width)
+        self.rows = [0] * self.height
+        self.cols = [0] * self.width
+        self.rescan()
+
@@ -0,0 +1,281 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+from time import monotonic, perf_counter, perf_counter_ns
+
+from instrument import Histogram, PERCENTILES
+from puzzle import Board, GameData, Mark
+
+
+STATE_NAMES = {
+    Mark.EMPTY: 'empty',
+    Mark.FILLED: 'filled',
+    Mark.POSSIBLE: 'possible',
+    Mark.BLANK: 'blank'}
+MARK_NAMES = {
+    'filled': Mark.FILLED,
+    'possible': Mark.POSSIBLE,
+    'blank': Mark.BLANK}
+CELL_DIGITS = bytes.maketrans(bytes(range(len(Board.STATES))), ''.join(map(str, range(len(Board.STATES)))).encode())
+GAMEDATA_PUZZLES = {gamedata.__name__: gamedata for gamedata in vars(GameData).values() if isinstance(gamedata, type)}
+TICK_SECONDS = 1.0
+BACKLOG = 4096
+
+
+class RequestError(Exception):
+    pass
+
+
+class Session:
+    def __init__(self, server, writer):
+        self.server = server
+        self.writer = writer
+        self.board = None
+        self.mark = Mark()
+        self.name = None
+        self.started = None
+        self.finished = None
+        self.timer = None
+        self.ticks = False
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or monotonic()) - self.started
+
+    def send(self, message):
+        self.writer.write(json.dumps(message, separators=(',', ':')).encode() + b'\n')
+
+    def tick(self):
+        self.send({'event': 'tick', 'elapsed': self.elapsed()})
+        self.timer = asyncio.get_running_loop().call_later(TICK_SECONDS, self.tick)
+
+    def stop_timer(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    def start(self):
+        self.started = monotonic()
+        self.finished = None
+        self.stop_timer()
+        if self.ticks:
+            self.timer = asyncio.get_running_loop().call_later(TICK_SECONDS, self.tick)
+
+    def require_board(self):
+        if self.board is None:
+            raise RequestError('no puzzle loaded')
+        return self.board
+
+    def load(self, request):
+        self.name = request.get('puzzle')
+        self.board = Board(self.server.puzzle(self.name))
+        self.mark = Mark()
+        self.ticks = bool(request.get('ticks'))
+        self.start()
+        return {'puzzle': self.name, 'height': self.board.height, 'width': self.board.width,
+                'row_clues': self.board.row_clues, 'col_clues': self.board.col_clues}
+
+    def mark_cell(self, request):
+        board = self.require_board()
+        if self.finished is not None:
+            raise RequestError('puzzle is already solved')
+        row, col = request.get('row'), request.get('col')
+        if (not isinstance(row, int) or not isinstance(col, int) or isinstance(row, bool) or isinstance(col, bool) or
+                not (0 <= row < board.height and 0 <= col < board.width)):
+            raise RequestError(f'no cell at row {row}, col {col}')
+        mark = request.get('mark', 'filled')
+        if not isinstance(mark, str):
+            raise RequestError(f'unknown mark {mark!r}')
+        if mark == 'dynamic':
+            mark = self.mark.state
+        elif mark in MARK_NAMES:
+            mark = MARK_NAMES[mark]
+        else:
+            raise RequestError(f'unknown mark {mark!r}')
+        state = board.mark(row, col, mark)
+        response = {'state': STATE_NAMES[state], 'row_solved': board.row_solved[row], 'col_solved': board.col_solved[col]}
+        if board.is_solved():
+            self.finished = monotonic()
+            self.stop_timer()
+            board.set_solved()
+            self.server.solved += 1
+            response['solved'] = True
+            response['notify'] = {'event': 'solved', 'puzzle': self.name, 'elapsed': self.elapsed()}
+        return response
+
+    def switch(self, request):
+        self.mark.switch_state()
+        return {'mark': STATE_NAMES[self.mark.state]}
+
+    def reset(self, request):
+        self.require_board().reset()
+        self.start()
+        return {}
+
+    def query(self, request):
+        board = self.require_board()
+        return {'puzzle': self.name, 'cells': bytes(board.cells).translate(CELL_DIGITS).decode(),
+                'mark': STATE_NAMES[self.mark.state], 'elapsed': self.elapsed(), 'solved': self.finished is not None,
+                'row_solved': board.row_solved, 'col_solved': board.col_solved}
+
+    def close(self):
+        self.stop_timer()
+
+
+class GameServer:
+    OPERATIONS = {
+        'load': Session.load,
+        'mark': Session.mark_cell,
+        'switch': Session.switch,
+        'reset': Session.reset,
+        'query': Session.query}
+
+    def __init__(self, pack=None):
+        self.pack = pack
+        self.puzzles = {}
+        self.sessions = 0
+        self.messages = 0
+        self.solved = 0
+
+    def puzzle(self, name):
+        if not isinstance(name, (str, int)) or isinstance(name, bool):
+            raise RequestError(f'puzzle must be a name or an id, not {name!r}')
+        if name not in self.puzzles:
+            if self.pack is not None:
+                try:
+                    self.puzzles[name] = self.pack.load(str(name))
+                except (KeyError, IndexError) as error:
+                    raise RequestError(str(error))
+            elif name in GAMEDATA_PUZZLES:
+                self.puzzles[name] = GAMEDATA_PUZZLES[name]
+            else:
+                raise RequestError(f'unknown puzzle {name!r}')
+        return self.puzzles[name]
+
+    def handle(self, session, line):
+        self.messages += 1
+        request = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise RequestError('requests must be JSON objects')
+            op = request.get('op')
+            operation = GameServer.OPERATIONS.get(op) if isinstance(op, str) else None
+            if operation is None:
+                raise RequestError(f'unknown op {op!r}')
+            response = operation(session, request)
+        except RequestError as error:
+            response = {'ok': False, 'error': str(error)}
+        except (KeyError, TypeError, ValueError) as error:
+            response = {'ok': False, 'error': f'bad request: {error}'}
+        else:
+            response['ok'] = True
+        if isinstance(request, dict) and 'id' in request:
+            response['id'] = request['id']
+        notify = response.pop('notify', None)
+        session.send(response)
+        if notify is not None:
+            session.send(notify)
+
+    async def serve_client(self, reader, writer):
+        self.sessions += 1
+        session = Session(self, writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.handle(session, line)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            session.close()
+            self.sessions -= 1
+            writer.close()
+
+
+async def serve(host, port, unix, pack):
+    game_server = GameServer(pack)
+    if unix:
+        server = await asyncio.start_unix_server(game_server.serve_client, path=unix, backlog=BACKLOG)
+    else:
+        server = await asyncio.start_server(game_server.serve_client, host, port, backlog=BACKLOG)
+    print(f'serving on {unix or f"{host}:{port}"}', file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+async def load_client(host, port, unix, puzzle, moves, rng, histogram):
+    if unix:
+        reader, writer = await asyncio.open_unix_connection(unix)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+
+    async def request(message):
+        started = perf_counter_ns()
+        writer.write(json.dumps(message).encode() + b'\n')
+        response = json.loads(await reader.readline())
+        histogram.add(perf_counter_ns() - started)
+        return response
+
+    loaded = await request({'op': 'load', 'puzzle': puzzle})
+    if not loaded['ok']:
+        raise RuntimeError(loaded['error'])
+    for _ in range(moves):
+        row, col = rng.randrange(loaded['height']), rng.randrange(loaded['width'])
+        response = await request({'op': 'mark', 'row': row, 'col': col, 'mark': rng.choice(('filled', 'dynamic'))})
+        if response.get('solved'):
+            await reader.readline()
+            await request({'op': 'reset'})
+    await request({'op': 'query'})
+    writer.close()
+    await writer.wait_closed()
+
+
+async def generate_load(host, port, unix, puzzle, clients, moves, seed):
+    histogram = Histogram()
+    rng = random.Random(seed)
+    started = perf_counter()
+    await asyncio.gather(*(load_client(host, port, unix, puzzle, moves, random.Random(rng.random()), histogram)
+                           for _ in range(clients)))
+    elapsed = perf_counter() - started
+    percentiles = ', '.join(f'p{percent} {histogram.percentile(percent) / 1000:.0f}us' for percent in PERCENTILES)
+    print(f'{clients} clients, {histogram.count} requests in {elapsed:.2f}s '
+          f'({histogram.count / elapsed:.0f} requests/s); latency {percentiles}, max {histogram.max / 1000:.0f}us')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve puzzle sessions over line-delimited JSON.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='listen on (or connect to) this Unix socket instead of TCP')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serving = commands.add_parser('serve', help='run the game server')
+    serving.add_argument('--pack', help='serve the puzzles in this pack instead of GameData')
+    loading = commands.add_parser('load', help='run a load-generating client against a server')
+    loading.add_argument('--clients', type=int, default=1000, help='concurrent sessions')
+    loading.add_argument('--moves', type=int, default=100, help='mark requests per session')
+    loading.add_argument('--puzzle', default='Kiwi')
+    loading.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        pack = None
+        if args.pack:
+            from pack import Pack
+            pack = Pack(args.pack)
+        try:
+            asyncio.run(serve(args.host, args.port, args.unix, pack))
+        except KeyboardInterrupt:
+            pass
+    else:
+        asyncio.run(generate_load(args.host, args.port, args.unix, args.puzzle, args.clients, args.moves, args.seed))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
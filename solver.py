@@ -0,0 +1,371 @@
+from collections import deque
+from functools import lru_cache
+from time import perf_counter
+from timeit import timeit
+
+from puzzle import LINE_CACHE_SIZE, GameData
+
+
+def line_cells(value, length):
+    return [int(bit) for bit in format(value, f'0{length}b')] if length else []
+
+
+def span(start, end, length):
+    return ((1 << (end - start)) - 1) << (length - end)
+
+
+def pack_left(runs, filled, blank, length):
+    filled_before = [0] * (length + 1)
+    blank_before = [0] * (length + 1)
+    for index in range(length):
+        filled_before[index + 1] = filled_before[index] + filled[index]
+        blank_before[index + 1] = blank_before[index] + blank[index]
+
+    starts = [0] * len(runs)
+    failed = set()
+
+    def place(enum, offset):
+        if enum == len(runs):
+            return filled_before[length] == filled_before[min(offset, length)]
+        if (enum, offset) in failed:
+            return False
+        run = runs[enum]
+        for start in range(offset, length - run + 1):
+            end = start + run
+            if blank_before[end] == blank_before[start] and (end == length or not filled[end]) and place(enum + 1, end + 1):
+                starts[enum] = start
+                return True
+            if filled[start]:
+                break
+        failed.add((enum, offset))
+        return False
+
+    return starts if place(0, 0) else None
+
+
+@lru_cache(maxsize=LINE_CACHE_SIZE)
+def solve_line(clue, known_filled, known_blank, length):
+    runs = tuple(run for run in clue if run)
+    filled = line_cells(known_filled, length)
+    blank = line_cells(known_blank, length)
+    left = pack_left(runs, filled, blank, length)
+    if left is None:
+        return None
+    right = pack_left(runs[::-1], filled[::-1], blank[::-1], length)
+    right = [length - start - run for start, run in zip(right[::-1], runs)]
+
+    forced_filled = known_filled
+    covered = 0
+    for run, left_start, right_start in zip(runs, left, right):
+        if right_start < left_start + run:
+            forced_filled |= span(right_start, left_start + run, length)
+        covered |= span(left_start, right_start + run, length)
+    forced_blank = known_blank | (span(0, length, length) & ~covered)
+    return forced_filled, forced_blank
+
+
+@lru_cache(maxsize=LINE_CACHE_SIZE)
+def settle_line(clue, known_filled, known_blank, length):
+    runs = tuple(run for run in clue if run)
+    filled = line_cells(known_filled, length)
+    blank = line_cells(known_blank, length)
+    blank_before = [0] * (length + 1)
+    filled_after = [0] * (length + 1)
+    for index in range(length):
+        blank_before[index + 1] = blank_before[index] + blank[index]
+    for index in range(length - 1, -1, -1):
+        filled_after[index] = filled_after[index + 1] + filled[index]
+
+    def fits(run, start):
+        end = start + run
+        return end <= length and blank_before[end] == blank_before[start] and (end == length or not filled[end])
+
+    feasible = [[False] * (length + 2) for _ in range(len(runs) + 1)]
+    for start in range(length + 2):
+        feasible[len(runs)][start] = start >= length or not filled_after[start]
+    for enum in range(len(runs) - 1, -1, -1):
+        run = runs[enum]
+        for start in range(length, -1, -1):
+            feasible[enum][start] = start < length and (
+                (not filled[start] and feasible[enum][start + 1]) or
+                (fits(run, start) and feasible[enum + 1][min(start + run + 1, length + 1)]))
+    if not feasible[0][0]:
+        return None
+
+    can_fill = [0] * (length + 1)
+    can_blank = [False] * length
+    reached = {(0, 0)}
+    for enum in range(len(runs) + 1):
+        for start in range(length + 1):
+            if (enum, start) not in reached or not feasible[enum][start]:
+                continue
+            if enum == len(runs):
+                for index in range(start, length):
+                    can_blank[index] = True
+                continue
+            if start < length and not filled[start] and feasible[enum][start + 1]:
+                can_blank[start] = True
+                reached.add((enum, start + 1))
+            run = runs[enum]
+            if fits(run, start) and feasible[enum + 1][min(start + run + 1, length + 1)]:
+                can_fill[start] += 1
+                can_fill[start + run] -= 1
+                if start + run < length:
+                    can_blank[start + run] = True
+                reached.add((enum + 1, min(start + run + 1, length + 1)))
+
+    forced_filled = forced_blank = 0
+    fillable = 0
+    for index in range(length):
+        fillable += can_fill[index]
+        bit = 1 << (length - (index + 1))
+        if not fillable:
+            forced_blank |= bit
+        elif not can_blank[index]:
+            forced_filled |= bit
+    return forced_filled | known_filled, forced_blank | known_blank
+
+
+class SolveResult:
+    def __init__(self):
+        self.solutions = []
+        self.nodes = 0
+        self.propagations = 0
+        self.elapsed = 0.0
+        self.timed_out = False
+        self.cancelled = False
+
+    def is_solvable(self):
+        return bool(self.solutions)
+
+    def is_unique(self):
+        return len(self.solutions) == 1 and not self.timed_out and not self.cancelled
+
+    def stats(self):
+        return {
+            'solutions': len(self.solutions),
+            'nodes': self.nodes,
+            'propagations': self.propagations,
+            'elapsed': self.elapsed,
+            'timed_out': self.timed_out}
+
+
+class SearchState:
+    def __init__(self, height, width):
+        self.row_filled = [0] * height
+        self.row_blank = [0] * height
+        self.col_filled = [0] * width
+        self.col_blank = [0] * width
+        self.unsettled = {('row', row) for row in range(height)} | {('col', col) for col in range(width)}
+
+    def copy(self):
+        state = SearchState.__new__(SearchState)
+        state.row_filled = self.row_filled[:]
+        state.row_blank = self.row_blank[:]
+        state.col_filled = self.col_filled[:]
+        state.col_blank = self.col_blank[:]
+        state.unsettled = set(self.unsettled)
+        return state
+
+    def set_cell(self, row, col, filled, height, width):
+        self.unsettled.add(('row', row))
+        self.unsettled.add(('col', col))
+        if filled:
+            self.row_filled[row] |= 1 << (width - (col + 1))
+            self.col_filled[col] |= 1 << (height - (row + 1))
+        else:
+            self.row_blank[row] |= 1 << (width - (col + 1))
+            self.col_blank[col] |= 1 << (height - (row + 1))
+
+
+class Solver:
+    PROBE_CELLS = 64
+
+    def __init__(self, gamedata):
+        self.height = gamedata.height
+        self.width = gamedata.width
+        self.row_clues = tuple(tuple(clue) for clue in gamedata.row_clues)
+        self.col_clues = tuple(tuple(clue) for clue in gamedata.col_clues)
+        self.row_full = span(0, self.width, self.width)
+        self.col_full = span(0, self.height, self.height)
+
+    def propagate(self, state, queue, result):
+        queued = set(queue)
+        while True:
+            while queue:
+                line = queue.popleft()
+                queued.discard(line)
+                if not self.apply(state, line, solve_line, queue, queued, result):
+                    return False
+            for line in sorted(state.unsettled):
+                if self.is_complete(state, line):
+                    state.unsettled.discard(line)
+                    continue
+                if not self.apply(state, line, settle_line, queue, queued, result):
+                    return False
+                state.unsettled.discard(line)
+            if not queue:
+                return True
+
+    def apply(self, state, line, line_solver, queue, queued, result):
+        result.propagations += 1
+        kind, index = line
+        if kind == 'row':
+            filled, blank = state.row_filled[index], state.row_blank[index]
+            solved = line_solver(self.row_clues[index], filled, blank, self.width)
+            length, other = self.width, 'col'
+        else:
+            filled, blank = state.col_filled[index], state.col_blank[index]
+            solved = line_solver(self.col_clues[index], filled, blank, self.height)
+            length, other = self.height, 'row'
+        if solved is None or solved[0] & solved[1]:
+            return False
+        for is_filled, changed in ((True, solved[0] & ~filled), (False, solved[1] & ~blank)):
+            while changed:
+                bit = changed & -changed
+                changed ^= bit
+                cross = length - bit.bit_length()
+                if kind == 'row':
+                    state.set_cell(index, cross, is_filled, self.height, self.width)
+                else:
+                    state.set_cell(cross, index, is_filled, self.height, self.width)
+                if (other, cross) not in queued:
+                    queued.add((other, cross))
+                    queue.append((other, cross))
+        return True
+
+    def is_complete(self, state, line):
+        kind, index = line
+        if kind == 'row':
+            return state.row_filled[index] | state.row_blank[index] == self.row_full
+        return state.col_filled[index] | state.col_blank[index] == self.col_full
+
+    def pick_cell(self, state):
+        best = None
+        for row in range(self.height):
+            unknown = self.row_full & ~(state.row_filled[row] | state.row_blank[row])
+            if unknown and (best is None or bin(unknown).count('1') < best[0]):
+                best = (bin(unknown).count('1'), row, None, unknown)
+        for col in range(self.width):
+            unknown = self.col_full & ~(state.col_filled[col] | state.col_blank[col])
+            if unknown and (best is None or bin(unknown).count('1') < best[0]):
+                best = (bin(unknown).count('1'), None, col, unknown)
+        if best is None:
+            return None
+        _, row, col, unknown = best
+        if row is not None:
+            return row, self.width - unknown.bit_length()
+        return self.height - unknown.bit_length(), col
+
+    def known(self, state):
+        return sum(bin(filled | blank).count('1') for filled, blank in zip(state.row_filled, state.row_blank))
+
+    def probe_cells(self, state):
+        lines = []
+        for row in range(self.height):
+            unknown = self.row_full & ~(state.row_filled[row] | state.row_blank[row])
+            if unknown:
+                lines.append((bin(unknown).count('1'), row, None, unknown))
+        for col in range(self.width):
+            unknown = self.col_full & ~(state.col_filled[col] | state.col_blank[col])
+            if unknown:
+                lines.append((bin(unknown).count('1'), None, col, unknown))
+        cells = []
+        for _, row, col, unknown in sorted(lines, key=lambda line: line[0]):
+            while unknown and len(cells) < Solver.PROBE_CELLS:
+                bit = unknown & -unknown
+                unknown ^= bit
+                cell = (row, self.width - bit.bit_length()) if row is not None else (self.height - bit.bit_length(), col)
+                if cell not in cells:
+                    cells.append(cell)
+            if len(cells) >= Solver.PROBE_CELLS:
+                break
+        return cells
+
+    def probe(self, state, result, interrupted):
+        best = None
+        forced = False
+        for row, col in self.probe_cells(state):
+            if interrupted():
+                return [state]
+            if (state.row_filled[row] | state.row_blank[row]) >> (self.width - (col + 1)) & 1:
+                continue
+            branches = []
+            for filled in (True, False):
+                branch = state.copy()
+                branch.set_cell(row, col, filled, self.height, self.width)
+                if self.propagate(branch, deque([('row', row), ('col', col)]), result):
+                    branches.append((self.known(branch), branch))
+            if not branches:
+                return []
+            if len(branches) == 1:
+                state = branches[0][1]
+                forced = True
+                continue
+            score = branches[0][0] + branches[1][0]
+            if best is None or score > best[0]:
+                best = (score, sorted(branches, key=lambda branch: branch[0], reverse=True))
+        if forced or best is None:
+            return [state]
+        return [branch for _, branch in best[1]]
+
+    def solve(self, max_solutions=2, timeout=None, state=None, cancelled=None):
+        result = SolveResult()
+        started = perf_counter()
+        deadline = started + timeout if timeout is not None else None
+        lines = [('row', row) for row in range(self.height)] + [('col', col) for col in range(self.width)]
+        stack = [(state or SearchState(self.height, self.width), lines)]
+
+        def interrupted():
+            return (deadline is not None and perf_counter() > deadline) or (cancelled is not None and cancelled())
+
+        while stack:
+            if deadline is not None and perf_counter() > deadline:
+                result.timed_out = True
+                break
+            if cancelled is not None and cancelled():
+                result.cancelled = True
+                break
+            state, dirty = stack.pop()
+            result.nodes += 1
+            if not self.propagate(state, deque(dirty), result):
+                continue
+            if self.pick_cell(state) is not None:
+                stack.extend((branch, []) for branch in self.probe(state, result, interrupted))
+                continue
+            result.solutions.append(state.row_filled)
+            if len(result.solutions) >= max_solutions:
+                break
+        result.elapsed = perf_counter() - started
+        return result
+
+
+def solve(gamedata, max_solutions=2, timeout=None, state=None, cancelled=None):
+    return Solver(gamedata).solve(max_solutions=max_solutions, timeout=timeout, state=state, cancelled=cancelled)
+
+
+def benchmark_solve_line(gamedatas=(GameData.Kiwi, GameData.Monk, GameData.Candle), number=1000):
+    results = {}
+    for gamedata in gamedatas:
+        lines = [(clue, gamedata.width) for clue in gamedata.row_clues]
+        lines += [(clue, gamedata.height) for clue in gamedata.col_clues]
+
+        def run():
+            for clue, length in lines:
+                solve_line.__wrapped__(clue, 0, 0, length)
+
+        results[gamedata.__name__] = timeit(run, number=number) / (number * len(lines)) * 1e6
+
+    runs = (2, 1) * 10 + (1,) * 10
+    length = 100
+    known_blank = 1 << (length - 4)
+    results[f'{len(runs)} runs / {length} cells'] = timeit(lambda: solve_line.__wrapped__(runs, 0, known_blank, length), number=number) / number * 1e6
+    return results
+
+
+if __name__ == '__main__':
+    for name, micros in benchmark_solve_line().items():
+        print(f'{name}: {micros:.1f} us/line')
+    for gamedata in (GameData.Kiwi, GameData.Monk, GameData.Candle):
+        result = solve(gamedata)
+        print(f'{gamedata.__name__}: unique={result.is_unique()} ' + ' '.join(f'{key}={value}' for key, value in result.stats().items()))
@@ -0,0 +1,133 @@
+import argparse
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from math import ceil
+
+from puzzle import puzzle_key
+
+
+STATS_PATH = os.path.join(os.environ.get('XDG_DATA_HOME', os.path.expanduser('~/.local/share')), 'pixel', 'stats.sqlite3')
+BATCH_SIZE = 256
+PERCENTILES = (50, 90, 99)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS completions (
+    id INTEGER PRIMARY KEY,
+    puzzle TEXT NOT NULL,
+    name TEXT,
+    height INTEGER NOT NULL,
+    width INTEGER NOT NULL,
+    elapsed REAL NOT NULL,
+    clicks INTEGER NOT NULL,
+    hints INTEGER NOT NULL,
+    completed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS completions_puzzle ON completions (puzzle, elapsed);
+CREATE INDEX IF NOT EXISTS completions_date ON completions (completed_at);
+'''
+
+
+def connect(path):
+    connection = sqlite3.connect(path)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    return connection
+
+
+class StatsStore:
+    def __init__(self, path=STATS_PATH):
+        self.path = path
+        self.connection = None
+        self.bests = {}
+        self.lock = threading.Lock()
+        self.loaded = threading.Event()
+        self.writes = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name='stats', daemon=True)
+        self.thread.start()
+
+    def record(self, gamedata, elapsed, clicks, hints):
+        key = puzzle_key(gamedata)
+        name = gamedata.name if hasattr(gamedata, 'name') else gamedata.__name__
+        with self.lock:
+            best = self.bests.get(key)
+            self.bests[key] = elapsed if best is None else min(best, elapsed)
+        self.writes.put((key, name, gamedata.height, gamedata.width, elapsed, clicks, hints, time.time()))
+
+    def run(self):
+        try:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = connect(self.path)
+            connection.executescript(SCHEMA)
+            for key, best in connection.execute('SELECT puzzle, MIN(elapsed) FROM completions GROUP BY puzzle'):
+                with self.lock:
+                    current = self.bests.get(key)
+                    self.bests[key] = best if current is None else min(current, best)
+        finally:
+            self.loaded.set()
+        while True:
+            rows = [self.writes.get()]
+            while rows[-1] is not None and len(rows) < BATCH_SIZE:
+                try:
+                    rows.append(self.writes.get_nowait())
+                except queue.Empty:
+                    break
+            with connection:
+                connection.executemany('INSERT INTO completions (puzzle, name, height, width, elapsed, clicks, hints, completed_at) '
+                                       'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', [row for row in rows if row is not None])
+            if rows[-1] is None:
+                connection.close()
+                return
+
+    def close(self):
+        self.writes.put(None)
+        self.thread.join()
+        if self.connection is not None:
+            self.connection.close()
+
+    def query(self, sql, parameters=()):
+        if self.connection is None:
+            self.loaded.wait()
+            self.connection = connect(self.path)
+        return self.connection.execute(sql, parameters)
+
+    def best(self, key):
+        return self.bests.get(key)
+
+    def best_time(self, gamedata):
+        return self.best(puzzle_key(gamedata))
+
+    def personal_bests(self):
+        return self.query('SELECT puzzle, name, height, width, MIN(elapsed), COUNT(*) FROM completions '
+                          'GROUP BY puzzle ORDER BY name').fetchall()
+
+    def percentiles(self, key, percents=PERCENTILES):
+        count, = self.query('SELECT COUNT(*) FROM completions WHERE puzzle = ?', (key,)).fetchone()
+        if not count:
+            return {}
+        return {percent: self.query('SELECT elapsed FROM completions WHERE puzzle = ? ORDER BY elapsed LIMIT 1 OFFSET ?',
+                                    (key, max(0, ceil(count * percent / 100) - 1))).fetchone()[0]
+                for percent in percents}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Show personal bests and completion time percentiles.')
+    parser.add_argument('--db', default=STATS_PATH, help='stats database')
+    args = parser.parse_args(argv)
+
+    store = StatsStore(args.db)
+    try:
+        for key, name, height, width, best, count in store.personal_bests():
+            percentiles = ' '.join(f'p{percent} {value:.2f}s' for percent, value in store.percentiles(key).items())
+            print(f'{name}\t{width}x{height}\t{count} completions\tbest {best:.2f}s\t{percentiles}')
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
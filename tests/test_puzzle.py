@@ -0,0 +1,32 @@
+import random
+
+import pytest
+
+from puzzle import Board, GameData, Mark, legacy_possibles, line_matches, placements
+
+
+PUZZLES = (GameData.Kiwi, GameData.Monk, GameData.Candle)
+
+
+@pytest.mark.parametrize('gamedata', PUZZLES, ids=lambda gamedata: gamedata.__name__)
+def test_line_matches_agrees_with_legacy_possibles(gamedata):
+    for clues, length in ((gamedata.row_clues, gamedata.width), (gamedata.col_clues, gamedata.height)):
+        for clue in set(clues):
+            possibles = set(legacy_possibles(clue, length))
+            mismatches = [value for value in range(1 << length) if line_matches.__wrapped__(clue, length, value) != (value in possibles)]
+            assert mismatches == [], f'{clue} over {length} cells'
+
+
+@pytest.mark.parametrize('gamedata', PUZZLES, ids=lambda gamedata: gamedata.__name__)
+def test_incremental_validation_matches_rescan(gamedata):
+    rng = random.Random(0)
+    board = Board(gamedata)
+    for move in range(2000):
+        if rng.random() < 0.1:
+            row = rng.randrange(board.height)
+            value = rng.choice(list(placements(board.row_clues[row], board.width)))
+            for col in range(board.width):
+                board.set_state(row, col, Mark.FILLED if value >> (board.width - (col + 1)) & 1 else Mark.EMPTY)
+        else:
+            board.mark(rng.randrange(board.height), rng.randrange(board.width), rng.choice((Mark.FILLED, Mark.POSSIBLE, Mark.BLANK)))
+        assert board.audit() == [], f'move {move}'
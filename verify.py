@@ -0,0 +1,153 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from time import perf_counter
+
+from pack import Pack
+from puzzle import load_puzzles
+from solver import solve
+
+
+class InvalidEntry:
+    def __init__(self, name, error):
+        self.name = name
+        self.height = None
+        self.width = None
+        self.error = f'{type(error).__name__}: {error}'
+
+
+def check_dimensions(puzzle):
+    if isinstance(puzzle, InvalidEntry):
+        return [puzzle.error]
+    if not isinstance(puzzle.height, int) or not isinstance(puzzle.width, int):
+        return [f'invalid size {puzzle.width!r}x{puzzle.height!r}']
+    errors = []
+    if len(puzzle.row_clues) != puzzle.height:
+        errors.append(f'{len(puzzle.row_clues)} row clues for height {puzzle.height}')
+    if len(puzzle.col_clues) != puzzle.width:
+        errors.append(f'{len(puzzle.col_clues)} column clues for width {puzzle.width}')
+    for kind, clues, length in (('row', puzzle.row_clues, puzzle.width), ('col', puzzle.col_clues, puzzle.height)):
+        for index, clue in enumerate(clues):
+            runs = [run for run in clue if run]
+            if any(not isinstance(run, int) or run < 0 for run in clue):
+                errors.append(f'{kind} {index} has an invalid clue {clue}')
+            elif sum(runs) + len(runs) - 1 > length:
+                errors.append(f'{kind} {index} clue {clue} does not fit in {length} cells')
+    if not errors and sum(map(sum, puzzle.row_clues)) != sum(map(sum, puzzle.col_clues)):
+        errors.append('row and column clues fill a different number of cells')
+    return errors
+
+
+def verify_puzzle(puzzle, timeout=None):
+    record = {'name': puzzle.name, 'height': puzzle.height, 'width': puzzle.width}
+    errors = check_dimensions(puzzle)
+    if errors:
+        record.update(status='invalid', errors=errors)
+        return record
+    try:
+        result = solve(puzzle, max_solutions=2, timeout=timeout)
+    except Exception as error:
+        record.update(status='error', errors=[repr(error)])
+        return record
+    if result.timed_out:
+        status = 'timeout'
+    elif result.is_unique():
+        status = 'unique'
+    elif result.is_solvable():
+        status = 'multiple'
+    else:
+        status = 'unsolvable'
+    record.update(result.stats(), status=status)
+    return record
+
+
+def verify_chunk(chunk, timeout=None):
+    return [(index, verify_puzzle(puzzle, timeout)) for index, puzzle in chunk]
+
+
+def chunked(items, size):
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def emit(report, index, record):
+    record['id'] = index
+    report.write(json.dumps(record) + '\n')
+    report.flush()
+    return record
+
+
+def isolate(entry, report, timeout):
+    index, puzzle = entry
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        try:
+            (_, record), = executor.submit(verify_chunk, [entry], timeout).result()
+        except BrokenProcessPool:
+            record = {'name': puzzle.name, 'height': puzzle.height, 'width': puzzle.width, 'status': 'crashed'}
+    return emit(report, index, record)
+
+
+def verify_library(puzzles, report, workers=None, chunksize=8, timeout=10.0):
+    workers = workers or os.cpu_count()
+    pending = chunked(list(enumerate(puzzles)), chunksize)
+    while pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(verify_chunk, chunk, timeout): chunk for chunk in pending}
+            broken = set()
+            for future in as_completed(futures):
+                try:
+                    records = future.result()
+                except BrokenProcessPool:
+                    broken.add(future)
+                    continue
+                for index, record in records:
+                    yield emit(report, index, record)
+        unfinished = [chunk for future, chunk in futures.items() if future in broken]
+        suspects, innocent = unfinished[:workers + 1], unfinished[workers + 1:]
+        if len(unfinished) == len(pending) and all(len(chunk) == 1 for chunk in suspects):
+            for chunk in suspects:
+                yield isolate(chunk[0], report, timeout)
+            pending = innocent
+        else:
+            pending = innocent + [half for chunk in suspects for half in (chunk[:len(chunk) // 2], chunk[len(chunk) // 2:]) if half]
+
+
+def load_library(path):
+    if path.endswith('.pxp'):
+        with Pack(path) as pack:
+            return list(pack)
+    return list(load_puzzles(path, invalid=InvalidEntry))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Verify that every puzzle in a library has exactly one solution.')
+    parser.add_argument('path', help='puzzle pack (.pxp), puzzle file or directory of puzzle files')
+    parser.add_argument('--report', default='-', help='JSONL report file (default: stdout)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--chunksize', type=int, default=8, help='puzzles dispatched per task')
+    parser.add_argument('--timeout', type=float, default=10.0,
+                        help='solver time limit per puzzle in seconds; random half-filled boards up to about 30x30 '
+                             'solve within it, larger ones may report timeout')
+    args = parser.parse_args(argv)
+
+    puzzles = load_library(args.path)
+    report = sys.stdout if args.report == '-' else open(args.report, 'w')
+    counts = {}
+    started = perf_counter()
+    try:
+        for record in verify_library(puzzles, report, args.workers, args.chunksize, args.timeout):
+            counts[record['status']] = counts.get(record['status'], 0) + 1
+    finally:
+        if report is not sys.stdout:
+            report.close()
+    elapsed = perf_counter() - started
+    summary = ', '.join(f'{status}: {count}' for status, count in sorted(counts.items()))
+    print(f'{len(puzzles)} puzzles in {elapsed:.2f}s ({len(puzzles) / elapsed:.1f}/s) on {args.workers or os.cpu_count()} workers; {summary}',
+          file=sys.stderr)
+    return 0 if counts.get('unique', 0) == len(puzzles) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())